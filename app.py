@@ -1,31 +1,77 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, Request, has_request_context, render_template, send_from_directory, request, redirect, url_for, session, flash, jsonify, g, make_response, stream_with_context, abort
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
 import os
 from datetime import datetime, timedelta
 import secrets
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
+import select
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
 from werkzeug.utils import secure_filename
 import hashlib
-from functools import wraps
+import base64
+import csv
+import gzip
+import io
+import json
+import mimetypes
+import random
+import shutil
+import smtplib
+import tempfile
+import urllib.request
+from contextlib import contextmanager
+from email import policy as email_policy
+from email.message import EmailMessage
+from email.utils import make_msgid
+from functools import wraps, lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import click
+import copy
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from PIL import Image  # Added missing import
-from sqlalchemy import text  # Added for database health check
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+from sqlalchemy import event, insert, text, update  # text added for database health check
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
 
 app = Flask(__name__)
 
 # Simple CSRF token generation (without Flask-WTF)
 def generate_csrf_token():
+    # Shared (cached) renders get a placeholder that is swapped for the real token at serve time
+    if g.get('shared_render'):
+        return CSRF_PLACEHOLDER
     if 'csrf_token' not in session:
         session['csrf_token'] = secrets.token_urlsafe(32)
     return session['csrf_token']
 
+CSRF_PLACEHOLDER = f"csrf-placeholder-{secrets.token_hex(16)}"
 app.jinja_env.globals['csrf_token'] = generate_csrf_token
+app.jinja_env.globals['now'] = datetime.utcnow
 
-def validate_csrf():
+def csrf_token_valid():
+    """Check the request's CSRF token without flashing; JSON endpoints report failures in the response"""
     token = request.form.get('csrf_token') or request.headers.get('X-CSRF-Token')
-    if not token or token != session.get('csrf_token'):
+    return bool(token) and token == session.get('csrf_token')
+
+def validate_csrf():
+    if not csrf_token_valid():
         flash('Security validation failed', 'error')
         return False
     return True
@@ -40,14 +86,137 @@ if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
 
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL or 'sqlite:///ntandostore.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Per-process pool; gunicorn.conf.py sizes threads/greenlets from the same variables
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
     'pool_recycle': 300,
-    'pool_size': 10,
-    'max_overflow': 20
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20))
 }
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['UPLOAD_TMP_FOLDER'] = os.environ.get('UPLOAD_TMP_FOLDER', 'uploads_tmp')  # same filesystem as UPLOAD_FOLDER
+app.config['UPLOAD_CHUNK_SIZE'] = 1024 * 1024
+app.config['UPLOAD_TMP_MAX_AGE'] = 3600  # seconds before an abandoned .part file is swept at bootstrap
+
+# Blob storage for uploads: 'local' (UPLOAD_FOLDER, served by /static) or 's3' (any S3-compatible service)
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local')
+app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET')
+app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL')  # MinIO, R2, moto_server; unset for AWS
+app.config['S3_REGION'] = os.environ.get('S3_REGION', 'us-east-1')
+app.config['S3_PUBLIC_URL'] = os.environ.get('S3_PUBLIC_URL')  # CDN base URL; unset serves presigned URLs
+app.config['S3_URL_EXPIRES'] = int(os.environ.get('S3_URL_EXPIRES', 3600))  # keep above the page/gallery cache TTLs
+app.config['S3_MAX_POOL_CONNECTIONS'] = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 20))
+app.config['S3_MULTIPART_THRESHOLD'] = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+
+# Responsive image derivatives, generated off the request thread
+app.config['IMAGE_VARIANT_WIDTHS'] = (320, 640, 1280)
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))  # 0 generates inline
+
+# Notification outbox - drained by a background dispatcher, never on the request thread
+app.config['WHATSAPP_API_URL'] = os.environ.get('WHATSAPP_API_URL')  # unset logs messages instead
+app.config['WHATSAPP_API_TOKEN'] = os.environ.get('WHATSAPP_API_TOKEN')
+app.config['WHATSAPP_ADMIN_NUMBER'] = os.environ.get('WHATSAPP_ADMIN_NUMBER', '+263718456744')
+app.config['NOTIFICATION_DISPATCHER'] = os.environ.get('NOTIFICATION_DISPATCHER', 'thread')  # or 'external'
+app.config['NOTIFY_BATCH_SIZE'] = int(os.environ.get('NOTIFY_BATCH_SIZE', 20))
+app.config['NOTIFY_RATE_PER_MINUTE'] = int(os.environ.get('NOTIFY_RATE_PER_MINUTE', 30))  # per destination
+app.config['NOTIFY_MAX_ATTEMPTS'] = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', 8))
+app.config['NOTIFY_BACKOFF_BASE'] = 5  # seconds, doubled per attempt
+app.config['NOTIFY_BACKOFF_MAX'] = 3600
+app.config['NOTIFY_POLL_INTERVAL'] = 10
+app.config['NOTIFY_HTTP_TIMEOUT'] = 10
+
+# Newsletter campaigns - sent over pooled SMTP connections by `flask send-newsletter` or a background thread
+app.config['SMTP_HOST'] = os.environ.get('SMTP_HOST')  # unset disables campaign sending
+app.config['SMTP_PORT'] = int(os.environ.get('SMTP_PORT', 587))
+app.config['SMTP_USERNAME'] = os.environ.get('SMTP_USERNAME')
+app.config['SMTP_PASSWORD'] = os.environ.get('SMTP_PASSWORD')
+app.config['SMTP_STARTTLS'] = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+app.config['SMTP_TIMEOUT'] = int(os.environ.get('SMTP_TIMEOUT', 30))
+app.config['NEWSLETTER_FROM'] = os.environ.get('NEWSLETTER_FROM', 'newsletter@ntandostore.com')
+app.config['PUBLIC_BASE_URL'] = os.environ.get('PUBLIC_BASE_URL', 'http://localhost:5000')  # for links in emails
+app.config['NEWSLETTER_SENDER'] = os.environ.get('NEWSLETTER_SENDER', 'thread')  # or 'external'
+app.config['NEWSLETTER_BATCH_SIZE'] = int(os.environ.get('NEWSLETTER_BATCH_SIZE', 100))  # deliveries claimed per commit
+app.config['NEWSLETTER_CONNECTIONS'] = int(os.environ.get('NEWSLETTER_CONNECTIONS', 4))  # concurrent SMTP sessions
+app.config['NEWSLETTER_MESSAGES_PER_CONNECTION'] = int(os.environ.get('NEWSLETTER_MESSAGES_PER_CONNECTION', 100))
+app.config['NEWSLETTER_RATE_PER_SECOND'] = float(os.environ.get('NEWSLETTER_RATE_PER_SECOND', 10))  # 0 = unlimited
+app.config['NEWSLETTER_MAX_ATTEMPTS'] = int(os.environ.get('NEWSLETTER_MAX_ATTEMPTS', 3))
+app.config['NEWSLETTER_CLAIM_TIMEOUT'] = 600  # seconds a claimed batch stays locked to its sender
+
+# Shared cache settings - version files let every gunicorn worker see invalidations
+app.config['CACHE_DIR'] = os.environ.get('CACHE_DIR', 'cache')
+app.config['COMPANY_LOGO_CACHE_TTL'] = int(os.environ.get('COMPANY_LOGO_CACHE_TTL', 300))  # seconds, 0 disables
+app.config['STATS_CACHE_TTL'] = int(os.environ.get('STATS_CACHE_TTL', 30))  # seconds, 0 disables
+app.config['ANALYTICS_MAX_BUCKETS'] = int(os.environ.get('ANALYTICS_MAX_BUCKETS', 400))  # days or months per series
+app.config['GALLERY_CACHE_TTL'] = int(os.environ.get('GALLERY_CACHE_TTL', 300))  # seconds, 0 disables
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 300))  # seconds, 0 disables
+app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))  # rows fetched per round trip
+app.config['BULK_BATCH_SIZE'] = int(os.environ.get('BULK_BATCH_SIZE', 500))  # rows per statement in bulk order updates/imports
+app.config['BULK_MAX_ROWS'] = int(os.environ.get('BULK_MAX_ROWS', 20000))  # per request
+
+# Admin login protection - checked before any DB read or password hash. The limiters and the hash
+# pool live in each worker process, so the server-wide budget is each limit x WEB_CONCURRENCY.
+# The hash pool bounds concurrent hashing, but the request waits for its hash: on sync workers it
+# caps CPU use without freeing the worker. Limits are keyed by client address, which is only
+# meaningful when TRUSTED_PROXY_COUNT matches the deployment: behind a proxy, 0 would put every
+# client in the proxy's bucket; exposed directly, anything above 0 lets clients pick their address.
+app.config['LOGIN_RATE_WINDOW'] = int(os.environ.get('LOGIN_RATE_WINDOW', 300))  # seconds
+app.config['LOGIN_RATE_LIMIT_IP'] = int(os.environ.get('LOGIN_RATE_LIMIT_IP', 10))  # attempts per window, 0 disables
+app.config['LOGIN_RATE_LIMIT_USER'] = int(os.environ.get('LOGIN_RATE_LIMIT_USER', 5))  # failures per window, 0 disables
+app.config['LOGIN_HASH_RATE_LIMIT'] = int(os.environ.get('LOGIN_HASH_RATE_LIMIT', 10))  # hashes per address and username per window, 0 disables
+app.config['LOGIN_HASH_RATE_WINDOW'] = int(os.environ.get('LOGIN_HASH_RATE_WINDOW', 10))  # seconds
+app.config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', 2))  # per worker process
+app.config['LOGIN_HASH_MAX_PENDING'] = int(os.environ.get('LOGIN_HASH_MAX_PENDING', 4))  # queued + running hashes per worker process
+# Proxies appending X-Forwarded-For: 1 for Render/Heroku's router (Procfile, render.yaml); 0 ignores the header
+app.config['TRUSTED_PROXY_COUNT'] = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))
+
+# Gallery pagination
+app.config['GALLERY_PAGE_SIZE'] = int(os.environ.get('GALLERY_PAGE_SIZE', 12))
+app.config['GALLERY_MAX_PAGE_SIZE'] = 48
+
+# Admin search
+app.config['SEARCH_PAGE_SIZE'] = 20
+app.config['SEARCH_MAX_PAGE_SIZE'] = 100
+app.config['SEARCH_MAX_PAGE'] = 50  # ranked offsets get slower the deeper they go
+app.config['SEARCH_CANDIDATES'] = int(os.environ.get('SEARCH_CANDIDATES', 250))  # newest matches ranked per query
+
+# Public order tracking API
+app.config['TRACKING_CACHE_TTL'] = int(os.environ.get('TRACKING_CACHE_TTL', 30))  # seconds, 0 disables
+app.config['TRACKING_MISS_CACHE_TTL'] = int(os.environ.get('TRACKING_MISS_CACHE_TTL', 60))  # unknown numbers; new orders do not clear it
+app.config['TRACKING_RATE_WINDOW'] = 60  # seconds
+app.config['TRACKING_RATE_LIMIT'] = int(os.environ.get('TRACKING_RATE_LIMIT', 60))  # lookups per IP per window, 0 disables
+app.config['TRACKING_MISS_RATE_WINDOW'] = 600  # seconds
+app.config['TRACKING_MISS_RATE_LIMIT'] = int(os.environ.get('TRACKING_MISS_RATE_LIMIT', 10))  # unknown numbers per IP per window, 0 disables
+
+# Live updates (server-sent events)
+# postgres (NOTIFY, all workers), local (this worker), auto. With local - always the case on SQLite - an
+# event only reaches clients connected to the worker that committed the change; run a single worker to see all
+app.config['EVENT_TRANSPORT'] = os.environ.get('EVENT_TRANSPORT', 'auto')
+# Streams per worker: each holds a thread outside gevent, and sync workers would be killed by their timeout.
+# With no free slot /events answers 503; the tracking widget then polls /api/track and the dashboard /admin/api/stats.
+app.config['SSE_MAX_CONNECTIONS'] = int(os.environ.get(
+    'SSE_MAX_CONNECTIONS', {'gevent': 200, 'sync': 0}.get(os.environ.get('SERVING_MODE', 'gthread'), 2)))
+app.config['SSE_MAX_DURATION'] = 300  # seconds; the browser reconnects, so workers can restart and threads recycle
+app.config['SSE_HEARTBEAT'] = 15  # seconds between keepalive comments
+app.config['SSE_RETRY_MS'] = 5000
+
+# Request instrumentation - SQL counts and timings per request
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 200))  # 0 disables slow-query logging
+app.config['SLOW_QUERY_EXPLAIN'] = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+app.config['SLOW_QUERY_EXPLAIN_INTERVAL'] = 600  # seconds between plans for the same statement
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # bearer token for /metrics; unset leaves it open
+
+# Logging - JSON lines, written by a background listener thread
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO').upper()
+app.config['LOG_DIR'] = os.environ.get('LOG_DIR', 'logs')
+app.config['LOG_TO_FILE'] = os.environ.get('LOG_TO_FILE', 'true').lower() == 'true'
+app.config['LOG_TO_STDOUT'] = os.environ.get('LOG_TO_STDOUT', 'false').lower() == 'true'
+app.config['LOG_FILE_MAX_BYTES'] = int(os.environ.get('LOG_FILE_MAX_BYTES', 20 * 1024 * 1024))
+app.config['LOG_FILE_BACKUPS'] = int(os.environ.get('LOG_FILE_BACKUPS', 5))
+app.config['LOG_QUEUE_SIZE'] = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped, never waited on
+app.config['LOG_REQUEST_SAMPLE_RATE'] = float(os.environ.get('LOG_REQUEST_SAMPLE_RATE', 0.1))  # share of routine request lines kept
+app.config['LOG_NOTIFICATION_SAMPLE_RATE'] = float(os.environ.get('LOG_NOTIFICATION_SAMPLE_RATE', 1.0))  # keep 1.0 while logging is the delivery
 
 # Security headers - compatible with both HTTP and HTTPS
 @app.after_request
@@ -70,26 +239,294 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
 
-# Setup logging
+# Setup logging - request threads only enqueue records; formatting and file I/O
+# (including rotation) happen on the QueueListener thread
+request_logger = app.logger.getChild('requests')
+notification_logger = app.logger.getChild('notifications')
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{8,128}$')
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line; fields passed as extra={'data': {...}} are merged in"""
+    
+    def format(self, record):
+        entry = {
+            'ts': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'pid': record.process,
+        }
+        entry.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text  # preformatted by DroppingQueueHandler.prepare
+        return json.dumps(entry, default=str)
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the request id and samples routine records from noisy loggers"""
+    
+    def __init__(self, sample_settings):
+        super().__init__()
+        self.sample_settings = sample_settings  # logger name -> config key holding its sample rate
+    
+    def filter(self, record):
+        setting = self.sample_settings.get(record.name)
+        # Warnings and errors are always kept
+        if setting and record.levelno < logging.WARNING and random.random() >= app.config[setting]:
+            return False
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: when the listener falls behind, records are counted and dropped"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+    
+    def prepare(self, record):
+        """Merge args into the message and preformat the traceback into exc_text, keeping them apart
+        
+        The base class folds the traceback into msg, which would bury it in the JSON message field.
+        """
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+    
+    def enqueue(self, record):
+        # The drop count is read and reset together, so concurrent loggers neither lose nor repeat it
+        with self.lock:
+            try:
+                if self.dropped:
+                    dropped, self.dropped = self.dropped, 0
+                    self.queue.put_nowait(logging.makeLogRecord({
+                        'name': app.logger.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                        'msg': f'Log queue full: dropped {dropped} records'}))
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+def configure_logging():
+    """Send app logs through a queue to the file and/or stdout; returns the started listener"""
+    handlers = []
+    if app.config['LOG_TO_FILE']:
+        os.makedirs(app.config['LOG_DIR'], exist_ok=True)
+        handlers.append(RotatingFileHandler(os.path.join(app.config['LOG_DIR'], 'ntandostore.log'),
+                                            maxBytes=app.config['LOG_FILE_MAX_BYTES'],
+                                            backupCount=app.config['LOG_FILE_BACKUPS']))
+    if app.config['LOG_TO_STDOUT']:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(JsonLogFormatter())
+    
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE']))
+    queue_handler.addFilter(RequestContextFilter({
+        request_logger.name: 'LOG_REQUEST_SAMPLE_RATE',
+        notification_logger.name: 'LOG_NOTIFICATION_SAMPLE_RATE',
+    }))
+    # Flask's default handler writes to stderr on the request thread
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flush what is queued on shutdown
+    return listener
+
 if not app.debug:
-    file_handler = RotatingFileHandler('logs/ntandostore.log', maxBytes=10240, backupCount=10)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
+    log_listener = configure_logging()
     app.logger.info('Ntandostore startup')
 
 db = SQLAlchemy(app)
 
-# Ensure upload directories exist
-try:
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'logos'), exist_ok=True)
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'company'), exist_ok=True)
-    os.makedirs('logs', exist_ok=True)
-except Exception as e:
-    app.logger.error(f"Warning: Could not create upload directories: {e}")
+# Request instrumentation - every statement on any engine is timed; those issued
+# inside a request are totalled on g and reported once the request finishes
+_explained_at = {}
+_explained_lock = threading.Lock()
+
+def _should_explain(statement):
+    """Plan each slow statement at most once per SLOW_QUERY_EXPLAIN_INTERVAL"""
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained_at.get(statement)
+        if last is not None and now - last < app.config['SLOW_QUERY_EXPLAIN_INTERVAL']:
+            return False
+        if len(_explained_at) >= 256:
+            _explained_at.clear()
+        _explained_at[statement] = now
+        return True
+
+def explain_statement(conn, statement, parameters):
+    """Query plan for a statement, run on the raw DBAPI cursor so it is not counted itself"""
+    postgres = conn.dialect.name == 'postgresql'
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.cursor()
+    try:
+        # A failed EXPLAIN must not abort the request's transaction on Postgres
+        if postgres:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if postgres:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        if postgres:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return ' | '.join(str(row[-1] if conn.dialect.name == 'sqlite' else row[0]) for row in rows)
+    finally:
+        cursor.close()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+    in_request = has_request_context()
+    if in_request and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.sql_ms += elapsed_ms
+        if elapsed_ms > g.sql_slowest[0]:
+            g.sql_slowest = (elapsed_ms, statement)
+    
+    threshold = app.config['SLOW_QUERY_MS']
+    if not threshold or elapsed_ms < threshold:
+        return
+    entry = {
+        'duration_ms': round(elapsed_ms, 2),
+        'endpoint': request.endpoint if in_request else None,
+        'statement': statement[:2000],
+    }
+    if (app.config['SLOW_QUERY_EXPLAIN'] and not executemany
+            and statement.lstrip()[:6].upper() == 'SELECT' and _should_explain(statement)):
+        try:
+            entry['plan'] = explain_statement(conn, statement, parameters)
+        except Exception as e:
+            entry['plan_error'] = str(e)
+    request_logger.warning('slow_query', extra={'data': entry})
+
+@app.before_request
+def assign_request_id():
+    """Reuse the proxy's X-Request-ID when it looks sane, so log lines join up across hops"""
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_ms = 0.0
+    g.sql_slowest = (0.0, None)
+
+@app.after_request
+def instrumentation_headers(response):
+    g.response_status = response.status_code
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    if app.config['SERVER_TIMING'] and 'request_started' in g:
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        # Streamed bodies (exports) run more queries after this point; the log line has the full count
+        response.headers['Server-Timing'] = (
+            f'db;dur={g.sql_ms:.2f};desc="{g.sql_queries} queries", app;dur={total_ms:.2f}'
+        )
+    return response
+
+# Prometheus metrics - under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+# (set by gunicorn.conf.py) and /metrics aggregates them, whichever worker serves the scrape
+http_requests = Counter('ntandostore_http_requests_total', 'HTTP requests served',
+                        ['endpoint', 'method', 'status'])
+http_request_duration = Histogram('ntandostore_http_request_duration_seconds', 'HTTP request latency',
+                                  ['endpoint', 'status'])
+db_pool_checked_out = Gauge('ntandostore_db_pool_checked_out', 'Pooled connections in use',
+                            multiprocess_mode='livesum')
+db_pool_overflow = Gauge('ntandostore_db_pool_overflow', 'Connections open beyond pool_size',
+                         multiprocess_mode='livesum')
+db_pool_checkouts = Counter('ntandostore_db_pool_checkouts_total', 'Connections checked out of the pool')
+db_pool_connects = Counter('ntandostore_db_pool_connects_total', 'New database connections opened')
+orders_created = Counter('ntandostore_orders_created_total', 'Orders created', ['service_id'])
+upload_bytes = Counter('ntandostore_upload_bytes_total', 'Bytes of uploaded images stored', ['folder'])
+upload_duration = Histogram('ntandostore_upload_processing_seconds', 'Upload processing time',
+                            ['folder', 'stage'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+newsletter_messages = Counter('ntandostore_newsletter_messages_total', 'Newsletter deliveries by outcome', ['result'])
+
+@event.listens_for(Pool, 'checkout')
+def _count_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    db_pool_checkouts.inc()
+
+@event.listens_for(Pool, 'connect')
+def _count_pool_connect(dbapi_connection, connection_record):
+    db_pool_connects.inc()
+
+def sample_pool_metrics():
+    """Record this process's pool usage; needs an app context"""
+    pool = db.engine.pool
+    if hasattr(pool, 'checkedout'):
+        db_pool_checked_out.set(pool.checkedout())
+    if hasattr(pool, 'overflow'):
+        db_pool_overflow.set(max(0, pool.overflow()))
+
+class OutboxCollector:
+    """Notification queue depth, read from the outbox at scrape time so it is the same from every worker"""
+    
+    def collect(self):
+        depth = GaugeMetricFamily('ntandostore_notification_queue_depth',
+                                  'Undelivered notifications by status', labels=['status'])
+        counts = dict(db.session.query(NotificationOutbox.status, db.func.count(NotificationOutbox.id))
+                      .filter(NotificationOutbox.status.in_(('pending', 'sending', 'failed')))
+                      .group_by(NotificationOutbox.status).all())
+        for status in ('pending', 'sending', 'failed'):
+            depth.add_metric([status], counts.get(status, 0))
+        yield depth
+        
+        oldest_due = (db.session.query(db.func.min(NotificationOutbox.next_attempt_at))
+                      .filter(NotificationOutbox.status == 'pending').scalar())
+        lag = max(0.0, (datetime.utcnow() - oldest_due).total_seconds()) if oldest_due else 0.0
+        yield GaugeMetricFamily('ntandostore_notification_queue_lag_seconds',
+                                'Time the oldest due notification has been waiting', value=lag)
+
+outbox_registry = CollectorRegistry(auto_describe=False)
+outbox_registry.register(OutboxCollector())
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    """One structured line and one metrics sample per request, error handlers and streamed responses included"""
+    if 'request_started' not in g:
+        return
+    duration = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unmatched'  # raw paths would explode label cardinality
+    status = str(g.get('response_status', 500))
+    http_requests.labels(endpoint, request.method, status).inc()
+    http_request_duration.labels(endpoint, status).observe(duration)
+    try:
+        sample_pool_metrics()
+    except Exception as e:
+        app.logger.error(f"Pool metrics sampling failed: {e}")
+    
+    slowest_ms, slowest_statement = g.sql_slowest
+    # Failed requests are logged at WARNING so sampling never drops them
+    level = logging.WARNING if error or int(status) >= 500 else logging.INFO
+    request_logger.log(level, 'request', extra={'data': {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': int(status),
+        'duration_ms': round(duration * 1000, 2),
+        'db_queries': g.sql_queries,
+        'db_ms': round(g.sql_ms, 2),
+        'db_slowest_ms': round(slowest_ms, 2),
+        'db_slowest': slowest_statement[:500] if slowest_statement else None,
+        'error': repr(error) if error else None,
+    }})
 
 # Input validation functions
 def validate_email(email):
@@ -120,6 +557,334 @@ def validate_file_upload(file):
     # Check file size (already enforced by MAX_CONTENT_LENGTH)
     return True, "Valid file"
 
+# Streaming uploads: hash and size while the body is parsed, then rename into place
+class HashingUploadFile:
+    """Temporary upload file that hashes and counts bytes as they are written"""
+    
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.committed = False
+    
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+    
+    def hexdigest(self):
+        return self._hash.hexdigest()
+    
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+    
+    def commit(self, destination):
+        """Atomically move the finished upload to destination"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        try:
+            os.replace(self.path, destination)
+        except OSError:
+            # UPLOAD_TMP_FOLDER on another filesystem; fall back to copy + rename
+            shutil.move(self.path, destination)
+        self.committed = True
+    
+    def close(self):
+        self._file.close()
+        if not self.committed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = HashingUploadFile(app.config['UPLOAD_TMP_FOLDER'])
+        # Tracked here too: a body that fails mid-parse never reaches request.files
+        self.__dict__.setdefault('_upload_streams', []).append(stream)
+        return stream
+    
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for stream in self.__dict__.pop('_upload_streams', ()):
+                stream.close()
+
+app.request_class = UploadRequest
+
+def spool_upload(file):
+    """Return a HashingUploadFile holding the upload, copying only if it was not parsed into one"""
+    if isinstance(file.stream, HashingUploadFile):
+        return file.stream
+    spooled = HashingUploadFile(app.config['UPLOAD_TMP_FOLDER'])
+    try:
+        for chunk in iter(lambda: file.stream.read(app.config['UPLOAD_CHUNK_SIZE']), b''):
+            spooled.write(chunk)
+    except Exception:
+        spooled.close()
+        raise
+    return spooled
+
+def upload_filename(file, prefix=''):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"{prefix}{timestamp}_{secure_filename(file.filename)}"
+
+# Blob storage - keys look like 'logos/<filename>' or 'company/variants/<filename>'
+class LocalStorage:
+    """Uploads on local disk under the static folder"""
+    
+    def __init__(self, root):
+        self.root = root
+        self.url_prefix = os.path.relpath(os.path.abspath(root), app.static_folder).replace(os.sep, '/')
+    
+    def _path(self, key):
+        path = os.path.join(self.root, *key.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+    
+    def save_upload(self, upload, key):
+        """Store a HashingUploadFile; it is renamed into place, not copied"""
+        upload.commit(self._path(key))
+    
+    def save_file(self, local_path, key):
+        """Store a local file, consuming it"""
+        shutil.move(local_path, self._path(key))
+    
+    @contextmanager
+    def local_copy(self, key):
+        yield os.path.join(self.root, *key.split('/'))
+    
+    def delete(self, *keys):
+        for key in keys:
+            try:
+                os.remove(os.path.join(self.root, *key.split('/')))
+            except FileNotFoundError:
+                pass
+    
+    def url(self, key):
+        return url_for('static', filename=f"{self.url_prefix}/{key}")
+
+class S3Storage:
+    """Uploads in an S3-compatible bucket, served from a CDN or with presigned URLs"""
+    
+    def __init__(self, bucket, endpoint_url=None, region=None, public_url=None, url_expires=3600,
+                 max_pool_connections=20, multipart_threshold=8 * 1024 * 1024):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        
+        self.bucket = bucket
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.url_expires = url_expires
+        # One pooled, thread-safe client per worker process
+        self.client = boto3.session.Session().client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(max_pool_connections=max_pool_connections,
+                          retries={'max_attempts': 3, 'mode': 'standard'},
+                          signature_version='s3v4')
+        )
+        # Files above the threshold go up as concurrent multipart uploads
+        self.transfer = TransferConfig(multipart_threshold=multipart_threshold,
+                                       multipart_chunksize=multipart_threshold,
+                                       max_concurrency=4)
+    
+    def _extra_args(self, key):
+        return {
+            'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream',
+            # Upload keys are timestamped and never overwritten
+            'CacheControl': 'public, max-age=31536000, immutable'
+        }
+    
+    def save_upload(self, upload, key):
+        try:
+            upload.seek(0)
+            self.client.upload_fileobj(upload, self.bucket, key,
+                                       ExtraArgs=self._extra_args(key), Config=self.transfer)
+        finally:
+            upload.close()
+    
+    def save_file(self, local_path, key):
+        try:
+            self.client.upload_file(local_path, self.bucket, key,
+                                    ExtraArgs=self._extra_args(key), Config=self.transfer)
+        finally:
+            os.remove(local_path)
+    
+    @contextmanager
+    def local_copy(self, key):
+        os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=app.config['UPLOAD_TMP_FOLDER'], suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, path, Config=self.transfer)
+            yield path
+        finally:
+            os.remove(path)
+    
+    def delete(self, *keys):
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            self.client.delete_objects(Bucket=self.bucket,
+                                       Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True})
+    
+    def url(self, key):
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return self.client.generate_presigned_url('get_object', Params={'Bucket': self.bucket, 'Key': key},
+                                                  ExpiresIn=self.url_expires)
+
+def create_storage():
+    backend = app.config['STORAGE_BACKEND']
+    if backend == 'local':
+        return LocalStorage(app.config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        if not app.config['S3_BUCKET']:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return S3Storage(app.config['S3_BUCKET'],
+                         endpoint_url=app.config['S3_ENDPOINT_URL'],
+                         region=app.config['S3_REGION'],
+                         public_url=app.config['S3_PUBLIC_URL'],
+                         url_expires=app.config['S3_URL_EXPIRES'],
+                         max_pool_connections=app.config['S3_MAX_POOL_CONNECTIONS'],
+                         multipart_threshold=app.config['S3_MULTIPART_THRESHOLD'])
+    raise RuntimeError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+storage = create_storage()
+
+def upload_url(folder, filename):
+    return storage.url(f"{folder}/{filename}")
+
+app.jinja_env.globals['upload_url'] = upload_url
+
+@app.cli.command('storage-check')
+def storage_check_command():
+    """Round-trip a small object through the configured storage backend"""
+    key = f"healthcheck/{secrets.token_hex(8)}.txt"
+    payload = secrets.token_bytes(32)
+    os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=app.config['UPLOAD_TMP_FOLDER'])
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    
+    storage.save_file(path, key)
+    try:
+        with storage.local_copy(key) as copy, open(copy, 'rb') as f:
+            if f.read() != payload:
+                raise SystemExit(f"❌ {key} read back different bytes")
+        with app.test_request_context():
+            url = storage.url(key)
+        if url.startswith(('http://', 'https://')):
+            with urllib.request.urlopen(url, timeout=10) as response:
+                served = response.read()
+        else:
+            served = app.test_client().get(url).data
+        if served != payload:
+            raise SystemExit(f"❌ {url} served different bytes")
+        print(f"✓ {app.config['STORAGE_BACKEND']} storage OK ({url.split('?')[0]})")
+    finally:
+        storage.delete(key)
+
+# Static assets - `flask build-assets` writes content-hashed, precompressed copies to static/dist
+# with a manifest; when the manifest exists url_for('static') emits the hashed names, which are
+# served with year-long immutable caching
+ASSET_DIRS = ('css', 'js', 'audio')
+ASSET_DIST = 'dist'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt')  # audio and images are already compressed
+ASSET_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # in order of preference
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def load_asset_manifest():
+    try:
+        with open(os.path.join(app.static_folder, ASSET_DIST, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+asset_manifest = load_asset_manifest()
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint == 'static':
+        fingerprinted = asset_manifest.get(values.get('filename'))
+        if fingerprinted:
+            values['filename'] = fingerprinted
+
+def build_static_assets():
+    """Write fingerprinted, precompressed copies of the static assets; returns the manifest"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("⚠ brotli is not installed; writing gzip variants only")
+    
+    dist_root = os.path.join(app.static_folder, ASSET_DIST)
+    staging = f"{dist_root}.tmp"  # swapped in whole, so a failed build leaves the old one
+    shutil.rmtree(staging, ignore_errors=True)
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(app.static_folder, asset_dir)):
+            for name in sorted(filenames):
+                source = os.path.join(dirpath, name)
+                relative = os.path.relpath(source, app.static_folder).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    data = f.read()
+                stem, ext = os.path.splitext(relative)
+                hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+                target = os.path.join(staging, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+                
+                if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+                    if brotli:
+                        variants['.br'] = brotli.compress(data, quality=11)
+                    for suffix, compressed in variants.items():
+                        if len(compressed) < len(data):
+                            with open(target + suffix, 'wb') as f:
+                                f.write(compressed)
+                manifest[relative] = f"{ASSET_DIST}/{hashed}"
+    
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    shutil.rmtree(dist_root, ignore_errors=True)
+    os.replace(staging, dist_root)
+    return manifest
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress static assets into static/dist"""
+    manifest = build_static_assets()
+    print(f"✓ {len(manifest)} static assets fingerprinted")
+
+def serve_static(filename):
+    """Static files; fingerprinted copies are immutable and sent precompressed when accepted"""
+    if not filename.startswith(f"{ASSET_DIST}/"):
+        return app.send_static_file(filename)
+    
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ASSET_ENCODINGS:
+        variant = safe_join(app.static_folder, filename + suffix)
+        if request.accept_encodings.quality(encoding) > 0 and variant and os.path.isfile(variant):
+            # Ranges, when asked for, apply to the encoded bytes
+            response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    response.cache_control.no_cache = None
+    return response
+
+app.view_functions['static'] = serve_static
+
 # Admin decorator
 def admin_required(f):
     @wraps(f)
@@ -150,6 +915,12 @@ class Logo(db.Model):
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     file_size = db.Column(db.Integer)
     file_hash = db.Column(db.String(64))
+    variants = db.Column(db.Text)  # JSON list of resized copies
+    
+    __table_args__ = (
+        db.Index('ix_logo_upload_date_id', 'upload_date', 'id'),
+        db.Index('ix_logo_file_hash', 'file_hash'),
+    )
 
 class CompanyLogo(db.Model):
     __tablename__ = 'company_logo'
@@ -158,6 +929,11 @@ class CompanyLogo(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     file_size = db.Column(db.Integer)
+    variants = db.Column(db.Text)  # JSON list of resized copies
+    
+    __table_args__ = (
+        db.Index('ix_company_logo_is_active', 'is_active'),
+    )
 
 class Order(db.Model):
     __tablename__ = 'orders'
@@ -175,6 +951,11 @@ class Order(db.Model):
     payment_status = db.Column(db.String(20), default='pending')
     estimated_completion = db.Column(db.DateTime)
     completed_date = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_orders_status_completed_date', 'status', 'completed_date'),
+        db.Index('ix_orders_order_date', 'order_date'),
+    )
 
 class ContactMessage(db.Model):
     __tablename__ = 'contact_messages'
@@ -186,6 +967,11 @@ class ContactMessage(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='new')
     ip_address = db.Column(db.String(45))
+    
+    __table_args__ = (
+        db.Index('ix_contact_messages_status', 'status'),
+        db.Index('ix_contact_messages_created_at', 'created_at'),
+    )
 
 class Newsletter(db.Model):
     __tablename__ = 'newsletter'
@@ -204,6 +990,10 @@ class Review(db.Model):
     review_text = db.Column(db.Text)
     is_approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_reviews_is_approved_created_at', 'is_approved', 'created_at'),
+    )
 
 class ServiceCategory(db.Model):
     __tablename__ = 'service_categories'
@@ -213,6 +1003,574 @@ class ServiceCategory(db.Model):
     icon = db.Column(db.String(50))
     is_active = db.Column(db.Boolean, default=True)
 
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(20), nullable=False, default='whatsapp')
+    destination = db.Column(db.String(50), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_notification_outbox_destination_sent_at', 'destination', 'sent_at'),
+        db.Index('ix_notification_outbox_claim_token', 'claim_token'),
+    )
+
+class OrderRollup(db.Model):
+    """Order totals per day or month, service and status, maintained as orders are written.
+    
+    orders/amount count orders placed in the bucket (by order_date) under their current status;
+    completions/revenue/completion_seconds count orders completed in the bucket (by
+    completed_date) and only appear on 'completed' rows.
+    """
+    __tablename__ = 'order_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(5), nullable=False)  # day, month
+    bucket = db.Column(db.Date, nullable=False)  # first day of the period
+    service_id = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    completions = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    completion_seconds = db.Column(db.Float, nullable=False, default=0)  # order_date to completed_date, summed
+    
+    __table_args__ = (
+        db.Index('ix_order_rollups_key', 'period', 'bucket', 'service_id', 'status', unique=True),
+    )
+
+class NewsletterCampaign(db.Model):
+    __tablename__ = 'newsletter_campaigns'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    body_text = db.Column(db.Text, nullable=False)
+    body_html = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='draft')  # draft, sending, sent, cancelled
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class NewsletterDelivery(db.Model):
+    """One campaign recipient, captured when the campaign starts; its status is the resume point"""
+    __tablename__ = 'newsletter_deliveries'
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, nullable=False)
+    subscriber_id = db.Column(db.Integer, nullable=False)
+    email = db.Column(db.String(100), nullable=False)
+    unsubscribe_token = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed, skipped, unknown
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.String(500))
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_newsletter_deliveries_campaign_subscriber', 'campaign_id', 'subscriber_id', unique=True),
+        db.Index('ix_newsletter_deliveries_campaign_status', 'campaign_id', 'status', 'next_attempt_at'),
+        db.Index('ix_newsletter_deliveries_claim_token', 'claim_token'),
+    )
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Cross-worker cache versions
+def get_cache_version(name):
+    """Return the current version stamp for a cache (mtime of its version file)"""
+    try:
+        return os.stat(os.path.join(app.config['CACHE_DIR'], f"{name}.version")).st_mtime_ns
+    except OSError:
+        return 0
+
+def bump_cache_version(name):
+    """Invalidate a cache in every worker by touching its version file"""
+    try:
+        os.makedirs(app.config['CACHE_DIR'], exist_ok=True)
+        path = os.path.join(app.config['CACHE_DIR'], f"{name}.version")
+        with open(path, 'a'):
+            pass
+        now = time.time_ns()
+        # Guarantee a new stamp even on filesystems with coarse mtime resolution
+        current = get_cache_version(name)
+        os.utime(path, ns=(now, max(now, current + 1)))
+    except OSError as e:
+        app.logger.warning(f"Could not bump cache version for {name}: {e}")
+
+MISSING = object()
+
+class VersionedCache:
+    """Per-process TTL cache that every worker drops when a version file it depends on changes"""
+    
+    def __init__(self, name, ttl_setting, max_entries=1024, depends_on=()):
+        self.name = name
+        self.ttl_setting = ttl_setting
+        self.max_entries = max_entries
+        self.version_names = (name,) + tuple(depends_on)
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+    
+    def lookup(self, key):
+        """Return (value, version); value is MISSING when the key is not cached"""
+        if app.config[self.ttl_setting] <= 0:
+            return MISSING, None
+        
+        version = tuple(get_cache_version(name) for name in self.version_names)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1], version
+        return MISSING, version
+    
+    def store(self, key, value, version):
+        """Cache value for key if the data version has not moved since lookup()"""
+        ttl = app.config[self.ttl_setting]
+        if ttl <= 0:
+            return
+        with self._lock:
+            if version == self._version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = (time.monotonic() + ttl, value)
+    
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        value, version = self.lookup(key)
+        if value is MISSING:
+            value = loader()
+            self.store(key, value, version)
+        return value
+    
+    def invalidate(self):
+        """Drop cached values here and in all other workers"""
+        with self._lock:
+            self._entries.clear()
+        bump_cache_version(self.name)
+
+# Active company logo cache
+company_logo_cache = VersionedCache('company_logo', 'COMPANY_LOGO_CACHE_TTL')
+
+def _load_active_company_logo():
+    logo = CompanyLogo.query.filter_by(is_active=True).first()
+    if not logo:
+        return None
+    return {
+        'id': logo.id,
+        'filename': logo.filename,
+        'upload_date': logo.upload_date,
+        'file_size': logo.file_size,
+        'variants': logo.variants
+    }
+
+def get_active_company_logo():
+    """Return the active company logo as a plain dict, cached per process"""
+    try:
+        return company_logo_cache.get(None, _load_active_company_logo)
+    except Exception as e:
+        app.logger.error(f"Error loading company logo: {e}")
+        return None
+
+@app.context_processor
+def inject_company_logo():
+    return {'company_logo': get_active_company_logo()}
+
+# Order analytics rollups. Every write that creates an order or changes its status records the
+# change in the same transaction, so totals and time series never scan the orders table.
+ROLLUP_PERIODS = ('day', 'month')
+ROLLUP_KEY = ('period', 'bucket', 'service_id', 'status')
+ROLLUP_MEASURES = ('orders', 'amount', 'completions', 'revenue', 'completion_seconds')
+ROLLUP_ORDER_FIELDS = ('service_id', 'status', 'amount', 'order_date', 'completed_date')
+
+def rollup_bucket(period, moment):
+    day = moment.date() if isinstance(moment, datetime) else moment
+    return day if period == 'day' else day.replace(day=1)
+
+def rollup_fields(order):
+    """The fields of an Order (or a row selecting ROLLUP_ORDER_FIELDS) that the rollups depend on"""
+    return {field: getattr(order, field) for field in ROLLUP_ORDER_FIELDS}
+
+def order_rollup_contributions(order):
+    """Yield (rollup key, measures) for what one order adds to the rollups"""
+    for period in ROLLUP_PERIODS:
+        yield ((period, rollup_bucket(period, order['order_date']), order['service_id'], order['status']),
+               {'orders': 1, 'amount': order['amount']})
+        if order['status'] == 'completed' and order['completed_date']:
+            yield ((period, rollup_bucket(period, order['completed_date']), order['service_id'], 'completed'),
+                   {'completions': 1, 'revenue': order['amount'],
+                    'completion_seconds': (order['completed_date'] - order['order_date']).total_seconds()})
+
+def add_rollup_change(deltas, before=None, after=None):
+    """Accumulate into deltas an order changing from before to after (rollup_fields dicts; None if absent)"""
+    for order, sign in ((before, -1), (after, 1)):
+        if order is None:
+            continue
+        for key, measures in order_rollup_contributions(order):
+            totals = deltas.setdefault(key, dict.fromkeys(ROLLUP_MEASURES, 0))
+            for measure, value in measures.items():
+                totals[measure] += sign * value
+    return deltas
+
+def apply_rollup_deltas(deltas):
+    """Add accumulated deltas to order_rollups with atomic upserts; the caller commits"""
+    rows = [dict(zip(ROLLUP_KEY, key), **measures) for key, measures in deltas.items() if any(measures.values())]
+    if not rows:
+        return
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(OrderRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={measure: getattr(OrderRollup, measure) + getattr(statement.excluded, measure)
+              for measure in ROLLUP_MEASURES})
+    for batch in chunked(rows, app.config['BULK_BATCH_SIZE']):
+        db.session.execute(statement, batch)
+
+def record_order_change(before=None, after=None):
+    apply_rollup_deltas(add_rollup_change({}, before, after))
+
+def rebuild_order_rollups():
+    """Recompute order_rollups from the orders table in one transaction; returns the number of orders"""
+    if db.engine.dialect.name == 'postgresql':
+        # Writers block on their upserts until the rebuild commits, then add their own changes
+        db.session.execute(text('LOCK TABLE order_rollups IN EXCLUSIVE MODE'))
+    # Deleting first also takes SQLite's write lock before orders are read
+    db.session.execute(db.delete(OrderRollup))
+    deltas, count = {}, 0
+    rows = db.session.execute(db.select(*(getattr(Order, field) for field in ROLLUP_ORDER_FIELDS))
+                              .execution_options(yield_per=app.config['BULK_BATCH_SIZE']))
+    for row in rows:
+        add_rollup_change(deltas, after=rollup_fields(row))
+        count += 1
+    apply_rollup_deltas(deltas)
+    db.session.commit()
+    bump_cache_version('orders')
+    return count
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Backfill the order analytics rollups from the orders table"""
+    count = rebuild_order_rollups()
+    print(f"✓ Order rollups rebuilt from {count} orders")
+
+# Dashboard statistics
+stats_cache = VersionedCache('dashboard_stats', 'STATS_CACHE_TTL', depends_on=('orders', 'contact_messages'))
+
+def _sum_where(condition, column):
+    return db.func.coalesce(db.func.sum(db.case((condition, column), else_=0)), 0)
+
+def compute_dashboard_stats():
+    """Compute order counts, revenue and new messages in a single round trip over the monthly rollups"""
+    this_month = rollup_bucket('month', datetime.utcnow())
+    new_messages = db.select(db.func.count(ContactMessage.id)).where(
+        ContactMessage.status == 'new'
+    ).scalar_subquery()
+    
+    row = db.session.execute(db.select(
+        db.func.coalesce(db.func.sum(OrderRollup.orders), 0),
+        _sum_where(OrderRollup.status == 'pending', OrderRollup.orders),
+        _sum_where(OrderRollup.status == 'in-progress', OrderRollup.orders),
+        _sum_where(OrderRollup.status == 'completed', OrderRollup.orders),
+        _sum_where(OrderRollup.status == 'cancelled', OrderRollup.orders),
+        db.func.coalesce(db.func.sum(OrderRollup.revenue), 0),
+        _sum_where(OrderRollup.bucket == this_month, OrderRollup.revenue),
+        new_messages
+    ).where(OrderRollup.period == 'month')).one()
+    
+    return {
+        'total_orders': row[0],
+        'pending_orders': row[1],
+        'in_progress_orders': row[2],
+        'completed_orders': row[3],
+        'cancelled_orders': row[4],
+        'total_revenue': float(row[5]),
+        'monthly_revenue': float(row[6]),
+        'new_messages': row[7] or 0,
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+def get_dashboard_stats():
+    """Return dashboard statistics, cached for STATS_CACHE_TTL seconds"""
+    return stats_cache.get(None, compute_dashboard_stats)
+
+# Gallery keyset pagination on (upload_date, id)
+gallery_cache = VersionedCache('gallery', 'GALLERY_CACHE_TTL')
+
+def encode_gallery_cursor(logo):
+    raw = f"{logo.upload_date.isoformat()}|{logo.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_gallery_cursor(cursor):
+    """Return (upload_date, id) from a cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        upload_date, logo_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(upload_date), int(logo_id)
+    except Exception:
+        raise ValueError('Invalid gallery cursor')
+
+def get_gallery_page(after=None, limit=None):
+    """Return (logos, next_cursor) for the page following the given cursor"""
+    limit = limit or app.config['GALLERY_PAGE_SIZE']
+    query = Logo.query
+    if after:
+        upload_date, logo_id = decode_gallery_cursor(after)
+        query = query.filter(db.or_(
+            Logo.upload_date < upload_date,
+            db.and_(Logo.upload_date == upload_date, Logo.id < logo_id)
+        ))
+    logos = query.order_by(Logo.upload_date.desc(), Logo.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(logos) > limit:
+        logos = logos[:limit]
+        next_cursor = encode_gallery_cursor(logos[-1])
+    return logos, next_cursor
+
+def get_gallery_count():
+    """Total number of portfolio logos, cached until the next upload or delete"""
+    return gallery_cache.get('count', lambda: Logo.query.count())
+
+def logo_category(logo):
+    """Gallery filter category, taken from the uploaded file's name"""
+    return 'logo' if 'logo' in logo.filename.lower() else 'branding'
+
+app.jinja_env.globals['logo_category'] = logo_category
+
+def serialize_logo(logo):
+    return {
+        'id': logo.id,
+        'client_name': logo.client_name,
+        'url': upload_url('logos', logo.filename),
+        'category': logo_category(logo),
+        'srcset': {
+            'webp': image_srcset(logo, 'logos'),
+            'fallback': image_srcset(logo, 'logos', 'fallback')
+        },
+        'upload_date': logo.upload_date.isoformat() if logo.upload_date else None,
+        'file_size': logo.file_size
+    }
+
+# Responsive image pipeline
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def native_thread_executor(max_workers, name):
+    """Executor on real OS threads, also under gevent where threading is monkey-patched to greenlets"""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=max_workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+# Resizing is CPU-bound; under gevent a greenlet pool would stall the worker's event loop
+image_executor = native_thread_executor(max(1, app.config['IMAGE_WORKERS']), 'image-variants')
+
+def generate_image_variants(source_path, dest_dir, stem=None):
+    """Write resized WebP and JPEG (PNG when transparent) copies, returning their metadata"""
+    os.makedirs(dest_dir, exist_ok=True)
+    stem = stem or os.path.splitext(os.path.basename(source_path))[0]
+    variants = []
+    
+    with Image.open(source_path) as img:
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        fallback = 'png' if has_alpha else 'jpeg'
+        base = img.convert('RGBA' if has_alpha else 'RGB')
+    
+    widths = sorted({min(width, base.width) for width in app.config['IMAGE_VARIANT_WIDTHS']})
+    for width in widths:
+        height = max(1, round(base.height * width / base.width))
+        resized = base if width == base.width else base.resize((width, height), Image.LANCZOS)
+        for fmt in ('webp', fallback):
+            filename = f"{stem}_{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+            path = os.path.join(dest_dir, filename)
+            if fmt == 'webp':
+                resized.save(path, 'WEBP', quality=80, method=4)
+            elif fmt == 'jpeg':
+                resized.save(path, 'JPEG', quality=82, optimize=True, progressive=True)
+            else:
+                resized.save(path, 'PNG', optimize=True)
+            variants.append({
+                'width': width,
+                'height': height,
+                'format': fmt,
+                'filename': f"variants/{filename}",
+                'size': os.path.getsize(path)
+            })
+    return variants
+
+def process_uploaded_image(model, record_id, folder):
+    """Build variants for an uploaded image and record them on its row"""
+    with app.app_context():
+        try:
+            record = db.session.get(model, record_id)
+            if not record:
+                return
+            os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+            with upload_duration.labels(folder, 'variants').time(), \
+                    storage.local_copy(f"{folder}/{record.filename}") as source, \
+                    tempfile.TemporaryDirectory(dir=app.config['UPLOAD_TMP_FOLDER']) as work_dir:
+                variants = generate_image_variants(source, work_dir,
+                                                   stem=os.path.splitext(record.filename)[0])
+                for variant in variants:
+                    storage.save_file(os.path.join(work_dir, os.path.basename(variant['filename'])),
+                                      f"{folder}/{variant['filename']}")
+            record.variants = json.dumps(variants)
+            db.session.commit()
+            
+            if model is CompanyLogo:
+                company_logo_cache.invalidate()
+            else:
+                gallery_cache.invalidate()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Image variant generation failed for {folder}/{record_id}: {e}")
+
+def schedule_image_variants(model, record_id, filename, folder):
+    """Queue variant generation so the upload request returns immediately"""
+    if not filename.lower().endswith(RASTER_EXTENSIONS):
+        return
+    if app.config['IMAGE_WORKERS'] <= 0:
+        process_uploaded_image(model, record_id, folder)
+    else:
+        image_executor.submit(process_uploaded_image, model, record_id, folder)
+
+def delete_image_variants(variants, folder):
+    storage.delete(*(f"{folder}/{variant['filename']}" for variant in parse_variants(variants)))
+
+@lru_cache(maxsize=1024)
+def parse_variants(variants):
+    return tuple(json.loads(variants)) if variants else ()
+
+def image_srcset(image, folder, fmt='webp'):
+    """Build a srcset for an image's variants; fmt 'fallback' selects the non-WebP copies"""
+    if not image:
+        return ''
+    variants = image['variants'] if isinstance(image, dict) else image.variants
+    return ', '.join(
+        f"{upload_url(folder, variant['filename'])} {variant['width']}w"
+        for variant in parse_variants(variants)
+        if (variant['format'] == fmt) or (fmt == 'fallback' and variant['format'] != 'webp')
+    )
+
+app.jinja_env.globals['image_srcset'] = image_srcset
+
+# Public page and fragment caching
+page_cache = VersionedCache('pages', 'PAGE_CACHE_TTL', max_entries=256,
+                            depends_on=('company_logo', 'orders', 'reviews'))
+fragment_cache = VersionedCache('fragments', 'PAGE_CACHE_TTL', max_entries=256)
+
+# Cache versions bumped by any ORM write to these models, whichever code path made it.
+# Bulk UPDATE statements bypass the session; their callers bump the version themselves.
+CACHE_VERSION_MODELS = {Review: 'reviews', Order: 'orders', CompanyLogo: 'company_logo'}
+
+@event.listens_for(Session, 'after_flush')
+def _collect_cache_versions(session, flush_context):
+    names = session.info.setdefault('cache_versions', set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        name = CACHE_VERSION_MODELS.get(type(instance))
+        if name:
+            names.add(name)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_cache_versions(session):
+    for name in session.info.pop('cache_versions', ()):
+        bump_cache_version(name)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_cache_versions(session):
+    session.info.pop('cache_versions', None)
+
+def _fill_csrf_placeholder(html):
+    if CSRF_PLACEHOLDER not in html:
+        return html
+    return html.replace(CSRF_PLACEHOLDER, generate_csrf_token())
+
+class FragmentCacheExtension(Extension):
+    """{% cache 'name', 'data_version', ... %}...{% endcache %} caches a rendered block"""
+    tags = {'cache'}
+    
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_fragment', [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+    
+    def _render_fragment(self, args, caller):
+        name, depends_on = args[0], args[1:]
+        key = (name,) + tuple(get_cache_version(dependency) for dependency in depends_on)
+        
+        def render():
+            shared = g.get('shared_render', False)
+            g.shared_render = True
+            try:
+                return str(caller())
+            finally:
+                g.shared_render = shared
+        
+        html = fragment_cache.get(key, render)
+        return Markup(html if g.get('shared_render') else _fill_csrf_placeholder(html))
+
+app.jinja_env.add_extension(FragmentCacheExtension)
+
+def _render_shared_page(view, args, kwargs):
+    """Render a view as anonymous HTML, or return None when the result must not be cached"""
+    g.shared_render = True
+    try:
+        response = make_response(view(*args, **kwargs))
+    finally:
+        g.shared_render = False
+    if response.status_code != 200 or response.mimetype != 'text/html':
+        return None, response
+    body = response.get_data(as_text=True)
+    return (body, hashlib.sha1(body.encode()).hexdigest()[:16]), response
+
+def cache_page(view):
+    """Serve a public page from the page cache with per-session CSRF tokens and ETags"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        # Pending flash messages are per-session, so render those pages fresh
+        if request.method != 'GET' or '_flashes' in session:
+            return view(*args, **kwargs)
+        
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        entry, version = page_cache.lookup(key)
+        if entry is MISSING:
+            entry, fresh_response = _render_shared_page(view, args, kwargs)
+            if entry is None:
+                return fresh_response
+            # Degraded fallback renders are served once, never cached for everyone else
+            if not g.pop('no_page_cache', False):
+                page_cache.store(key, entry, version)
+        
+        body, digest = entry
+        token = generate_csrf_token() if CSRF_PLACEHOLDER in body else ''
+        response = app.response_class(body.replace(CSRF_PLACEHOLDER, token) if token else body,
+                                      mimetype='text/html')
+        response.set_etag(f"{digest}-{hashlib.sha1(token.encode()).hexdigest()[:8]}")
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+    return decorated_function
+
 # Enhanced Services Configuration
 SERVICES = {
     'business_email': {
@@ -298,136 +1656,765 @@ SERVICES = {
     }
 }
 
+class ServiceCatalog:
+    """Immutable view of SERVICES with per-category views and pre-serialized JSON, built once at import"""
+    
+    def __init__(self, services):
+        frozen = {}
+        by_category = {}
+        for service_id, service in services.items():
+            entry = MappingProxyType({**service, 'features': tuple(service.get('features', ()))})
+            frozen[service_id] = entry
+            by_category.setdefault(entry['category'], {})[service_id] = entry
+        
+        self.services = MappingProxyType(frozen)
+        self.by_category = MappingProxyType({cat: MappingProxyType(items) for cat, items in by_category.items()})
+        self.categories = MappingProxyType({cat: tuple(items.items()) for cat, items in by_category.items()})
+        
+        # JSON payloads and strong ETags for /api/services, plus HTML-safe copies for inline scripts
+        self._json = {}
+        self._etags = {}
+        self._script_json = {}
+        for category in ('all',) + tuple(self.by_category):
+            view = self.in_category(category)
+            plain = {service_id: {**service, 'features': list(service['features'])}
+                     for service_id, service in view.items()}
+            body = json.dumps({'category': category, 'services': plain}, separators=(',', ':')).encode()
+            self._json[category] = body
+            self._etags[category] = hashlib.sha256(body).hexdigest()[:32]
+            self._script_json[category] = htmlsafe_json_dumps(plain)
+    
+    def __contains__(self, service_id):
+        return service_id in self.services
+    
+    def get(self, service_id):
+        return self.services.get(service_id)
+    
+    def in_category(self, category):
+        """Services for a category; 'all' returns the whole catalog, unknown categories are empty"""
+        if category == 'all':
+            return self.services
+        return self.by_category.get(category, EMPTY_SERVICES)
+    
+    def json(self, category='all'):
+        """Return (body, etag) for a category, or (None, None) if it does not exist"""
+        if category not in self._json:
+            return None, None
+        return self._json[category], self._etags[category]
+    
+    def script_json(self, category='all'):
+        return self._script_json.get(category, Markup('{}'))
+
+EMPTY_SERVICES = MappingProxyType({})
+SERVICE_CATALOG = ServiceCatalog(SERVICES)
+
 def generate_tracking_number():
     """Generate unique tracking number"""
     return f"NTD-{datetime.now().strftime('%Y%m%d')}-{secrets.token_hex(3).upper()}"
 
-def send_whatsapp_notification(order_data):
-    """Send WhatsApp notification about new order"""
+def format_notification_message(order_data):
+    """Build the WhatsApp message text for a new order or contact request"""
+    return f"""
+🔔 NEW ORDER - Ntandostore
+
+📦 Service: {order_data.get('service', 'Unknown')}
+💰 Amount: ${order_data.get('amount', 0.00)}
+
+👤 Customer Details:
+Name: {order_data.get('customer_name', 'N/A')}
+Email: {order_data.get('customer_email', 'N/A')}
+Phone: {order_data.get('customer_phone', 'N/A')}
+
+📝 Details: {order_data.get('details', 'No details provided')}
+
+🕒 Order Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+🔍 Tracking: {order_data.get('tracking_number', 'N/A')}
+
+Payment Number: +263786831091 (EcoCash/Innbucks)
+        """
+
+def queue_notification(order_data, destination=None):
+    """Add a WhatsApp notification to the outbox in the caller's transaction"""
+    db.session.add(NotificationOutbox(
+        channel='whatsapp',
+        destination=destination or app.config['WHATSAPP_ADMIN_NUMBER'],
+        message=format_notification_message(order_data)
+    ))
+
+def send_notification_batch(destination, messages):
+    """Deliver messages to one destination, raising on any provider failure"""
+    url = app.config['WHATSAPP_API_URL']
+    if not url:
+        for message in messages:
+            notification_logger.info('whatsapp_notification', extra={'data': {
+                'destination': destination, 'text': message}})
+        return
+    
+    headers = {'Content-Type': 'application/json'}
+    if app.config['WHATSAPP_API_TOKEN']:
+        headers['Authorization'] = f"Bearer {app.config['WHATSAPP_API_TOKEN']}"
+    request_body = json.dumps({'to': destination, 'messages': messages}).encode()
+    provider_request = urllib.request.Request(url, data=request_body, headers=headers, method='POST')
+    # urlopen raises HTTPError for any 4xx/5xx response
+    with urllib.request.urlopen(provider_request, timeout=app.config['NOTIFY_HTTP_TIMEOUT']) as response:
+        response.read()
+
+class NotificationDispatcher:
+    """Drains the notification outbox with batching, retries and per-destination rate limits"""
+    
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def ensure_started(self):
+        """Start the background thread for this process if it is not running.
+        
+        Called at worker boot (gunicorn post_worker_init) so messages left in the outbox by a
+        previous process are sent without waiting for a new order, and again on every enqueue.
+        """
+        if app.config['NOTIFICATION_DISPATCHER'] != 'thread':
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.run_forever, name='notification-dispatcher', daemon=True)
+            self._thread.start()
+    
+    def wake(self):
+        self._wake.set()
+    
+    def run_forever(self):
+        while True:
+            try:
+                with app.app_context():
+                    processed = self.dispatch_once()
+            except Exception as e:
+                app.logger.error(f"Notification dispatcher error: {e}")
+                processed = 0
+            if not processed:
+                self._wake.wait(app.config['NOTIFY_POLL_INTERVAL'])
+                self._wake.clear()
+    
+    def _claim(self, now):
+        """Atomically claim due messages so concurrent dispatchers never send one twice"""
+        claimable = db.or_(
+            db.and_(NotificationOutbox.status == 'pending', NotificationOutbox.next_attempt_at <= now),
+            db.and_(NotificationOutbox.status == 'sending', NotificationOutbox.locked_until < now)
+        )
+        ids = [row.id for row in db.session.query(NotificationOutbox.id).filter(claimable)
+               .order_by(NotificationOutbox.id).limit(app.config['NOTIFY_BATCH_SIZE'])]
+        if not ids:
+            return []
+        
+        token = secrets.token_hex(16)
+        NotificationOutbox.query.filter(NotificationOutbox.id.in_(ids), claimable).update({
+            NotificationOutbox.status: 'sending',
+            NotificationOutbox.claim_token: token,
+            NotificationOutbox.locked_until: now + timedelta(minutes=5)
+        }, synchronize_session=False)
+        db.session.commit()
+        return NotificationOutbox.query.filter_by(claim_token=token).order_by(NotificationOutbox.id).all()
+    
+    def _remaining_allowance(self, destination, now):
+        sent_recently = db.session.query(db.func.count(NotificationOutbox.id)).filter(
+            NotificationOutbox.destination == destination,
+            NotificationOutbox.sent_at >= now - timedelta(minutes=1)
+        ).scalar()
+        return max(0, app.config['NOTIFY_RATE_PER_MINUTE'] - sent_recently)
+    
+    def _schedule_retry(self, row, error, now):
+        row.attempts += 1
+        row.last_error = str(error)[:500]
+        if row.attempts >= app.config['NOTIFY_MAX_ATTEMPTS']:
+            row.status = 'failed'
+            app.logger.error(f"Notification {row.id} to {row.destination} failed permanently: {error}")
+            return
+        delay = min(app.config['NOTIFY_BACKOFF_BASE'] * 2 ** (row.attempts - 1), app.config['NOTIFY_BACKOFF_MAX'])
+        row.status = 'pending'
+        row.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.5, 1.5))
+    
+    def dispatch_once(self):
+        """Claim and send one batch of due messages, returning how many were processed"""
+        now = datetime.utcnow()
+        claimed = self._claim(now)
+        
+        by_destination = {}
+        for row in claimed:
+            by_destination.setdefault(row.destination, []).append(row)
+        
+        for destination, rows in by_destination.items():
+            allowance = self._remaining_allowance(destination, now)
+            sendable, deferred = rows[:allowance], rows[allowance:]
+            
+            # Over the rate limit: release without counting an attempt
+            for row in deferred:
+                row.status = 'pending'
+                row.next_attempt_at = now + timedelta(seconds=60)
+            
+            if sendable:
+                try:
+                    send_notification_batch(destination, [row.message for row in sendable])
+                    for row in sendable:
+                        row.status = 'sent'
+                        row.sent_at = datetime.utcnow()
+                except Exception as e:
+                    app.logger.warning(f"Notification batch to {destination} failed: {e}")
+                    for row in sendable:
+                        self._schedule_retry(row, e, now)
+            
+            for row in rows:
+                row.claim_token = None
+                row.locked_until = None
+            db.session.commit()
+        
+        return len(claimed)
+
+notification_dispatcher = NotificationDispatcher()
+
+def notify_dispatcher():
+    """Wake the dispatcher after an outbox write has been committed"""
+    notification_dispatcher.ensure_started()
+    notification_dispatcher.wake()
+
+@app.cli.command('dispatch-notifications')
+def dispatch_notifications_command():
+    """Run the notification dispatcher in the foreground"""
+    notification_dispatcher.run_forever()
+
+# Newsletter campaigns. Starting a campaign snapshots the active subscribers into
+# newsletter_deliveries; senders then claim batches of due deliveries the way the notification
+# dispatcher claims outbox rows, so a restarted sender resumes from the last committed batch.
+UNSUBSCRIBE_PLACEHOLDER = '{unsubscribe_url}'  # may appear in campaign bodies; appended as a footer if not
+UNSUBSCRIBE_TOKEN_SENTINEL = '__token__'
+DELIVERY_STATUSES = ('pending', 'sending', 'sent', 'failed', 'skipped', 'unknown')
+# The default 78-column folding would RFC 2047-encode the long List-Unsubscribe URL, which clients ignore
+NEWSLETTER_POLICY = email_policy.SMTP.clone(max_line_length=998)
+
+class PermanentSendError(Exception):
+    """The SMTP server rejected this message with a 5xx; sending it again would fail the same way"""
+
+class SmtpUnavailable(Exception):
+    """No SMTP session could be opened; nothing in the batch was attempted"""
+
+class SmtpPool:
+    """SMTP sessions shared by the sender threads, each retired after NEWSLETTER_MESSAGES_PER_CONNECTION"""
+    
+    def __init__(self):
+        self._idle = queue.LifoQueue()
+    
+    def _connect(self):
+        try:
+            connection = smtplib.SMTP(app.config['SMTP_HOST'], app.config['SMTP_PORT'],
+                                      timeout=app.config['SMTP_TIMEOUT'])
+            if app.config['SMTP_STARTTLS']:
+                connection.starttls()
+            if app.config['SMTP_USERNAME']:
+                connection.login(app.config['SMTP_USERNAME'], app.config['SMTP_PASSWORD'])
+        except (OSError, smtplib.SMTPException) as e:
+            raise SmtpUnavailable(f"{app.config['SMTP_HOST']}:{app.config['SMTP_PORT']}: {e}") from e
+        connection.messages_sent = 0
+        return connection
+    
+    def _release(self, connection):
+        if connection.messages_sent >= app.config['NEWSLETTER_MESSAGES_PER_CONNECTION']:
+            self._close(connection)
+        else:
+            self._idle.put(connection)
+    
+    def _close(self, connection):
+        try:
+            connection.quit()
+        except (OSError, smtplib.SMTPException):
+            connection.close()
+    
+    def send(self, message):
+        """Send one message; raises PermanentSendError on a 5xx rejection, anything else is transient"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection.send_message(message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+            # smtplib resets the session after these, so it stays usable
+            self._release(connection)
+            if isinstance(e, smtplib.SMTPRecipientsRefused):
+                code = next(iter(e.recipients.values()))[0]
+            else:
+                code = e.smtp_code
+            if code >= 500:
+                raise PermanentSendError(str(e)) from e
+            raise
+        except Exception:
+            connection.close()
+            raise
+        connection.messages_sent += 1
+        self._release(connection)
+    
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+class Pacer:
+    """Spaces wait() returns at most rate per second across threads; 0 means no limit"""
+    
+    def __init__(self, rate):
+        self._interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        time.sleep(slot - now)
+
+def render_campaign(campaign):
+    """Compose the campaign once; build_newsletter_message only fills in each recipient's link"""
+    text_body = campaign.body_text
+    if UNSUBSCRIBE_PLACEHOLDER not in text_body:
+        text_body += f"\n\n--\nUnsubscribe: {UNSUBSCRIBE_PLACEHOLDER}\n"
+    html_body = campaign.body_html
+    if html_body and UNSUBSCRIBE_PLACEHOLDER not in html_body:
+        html_body += (f'<p style="font-size:12px;color:#666">'
+                      f'<a href="{UNSUBSCRIBE_PLACEHOLDER}">Unsubscribe</a></p>')
+    with app.test_request_context(base_url=app.config['PUBLIC_BASE_URL']):
+        link = url_for('unsubscribe', token=UNSUBSCRIBE_TOKEN_SENTINEL, _external=True)
+    link_prefix, link_suffix = link.split(UNSUBSCRIBE_TOKEN_SENTINEL)
+    return {
+        'subject': campaign.subject,
+        'text': text_body,
+        'html': html_body,
+        'link_prefix': link_prefix,
+        'link_suffix': link_suffix,
+        'domain': app.config['NEWSLETTER_FROM'].rpartition('@')[2].rstrip('>') or None,
+    }
+
+def build_newsletter_message(rendered, email, token):
+    unsubscribe_url = rendered['link_prefix'] + token + rendered['link_suffix']
+    message = EmailMessage(policy=NEWSLETTER_POLICY)
+    message['Subject'] = rendered['subject']
+    message['From'] = app.config['NEWSLETTER_FROM']
+    message['To'] = email
+    message['Message-ID'] = make_msgid(domain=rendered['domain'])
+    message['List-Unsubscribe'] = f"<{unsubscribe_url}>"
+    message['List-Unsubscribe-Post'] = 'List-Unsubscribe=One-Click'
+    message.set_content(rendered['text'].replace(UNSUBSCRIBE_PLACEHOLDER, unsubscribe_url))
+    if rendered['html']:
+        message.add_alternative(rendered['html'].replace(UNSUBSCRIBE_PLACEHOLDER, unsubscribe_url), subtype='html')
+    return message
+
+def start_campaign(campaign):
+    """Snapshot the active subscribers as pending deliveries; the caller commits"""
+    now = datetime.utcnow()
+    # yield_per streams subscribers with a server-side cursor instead of loading the whole list
+    result = db.session.execute(
+        db.select(Newsletter.id, Newsletter.email, Newsletter.unsubscribe_token)
+        .where(Newsletter.is_active.is_(True)).order_by(Newsletter.id)
+        .execution_options(yield_per=app.config['BULK_BATCH_SIZE']))
+    recipients = 0
+    for rows in result.partitions():
+        db.session.execute(insert(NewsletterDelivery), [
+            {'campaign_id': campaign.id, 'subscriber_id': row.id, 'email': row.email,
+             'unsubscribe_token': row.unsubscribe_token, 'status': 'pending', 'attempts': 0, 'next_attempt_at': now}
+            for row in rows])
+        recipients += len(rows)
+    campaign.status = 'sending'
+    campaign.started_at = now
+    return recipients
+
+def campaign_progress(campaign_id):
+    campaign = db.session.get(NewsletterCampaign, campaign_id)
+    counts = dict(db.session.execute(
+        db.select(NewsletterDelivery.status, db.func.count(NewsletterDelivery.id))
+        .where(NewsletterDelivery.campaign_id == campaign_id).group_by(NewsletterDelivery.status)).all())
+    return {
+        'id': campaign.id,
+        'subject': campaign.subject,
+        'status': campaign.status,
+        'recipients': sum(counts.values()),
+        **{status: counts.get(status, 0) for status in DELIVERY_STATUSES},
+        'started_at': campaign.started_at.isoformat() if campaign.started_at else None,
+        'finished_at': campaign.finished_at.isoformat() if campaign.finished_at else None,
+    }
+
+class CampaignSender:
+    """Sends one campaign's due deliveries in claimed batches over pooled, rate-limited SMTP sessions"""
+    
+    def __init__(self, campaign_id):
+        self.campaign_id = campaign_id
+        self.pool = SmtpPool()
+        self.pacer = Pacer(app.config['NEWSLETTER_RATE_PER_SECOND'])
+        self.unavailable = None
+    
+    def _deliveries(self, *conditions):
+        return NewsletterDelivery.query.filter(NewsletterDelivery.campaign_id == self.campaign_id, *conditions)
+    
+    def _abandon_stale(self, now):
+        """A dead sender's claimed deliveries may already be accepted by the server; never send them twice"""
+        self._deliveries(NewsletterDelivery.status == 'sending', NewsletterDelivery.locked_until < now).update({
+            NewsletterDelivery.status: 'unknown',
+            NewsletterDelivery.claim_token: None,
+            NewsletterDelivery.locked_until: None,
+            NewsletterDelivery.last_error: 'Sender stopped before recording the result'
+        }, synchronize_session=False)
+        db.session.commit()
+    
+    def _claim(self, now):
+        due = db.and_(NewsletterDelivery.status == 'pending', NewsletterDelivery.next_attempt_at <= now)
+        ids = [row.id for row in self._deliveries(due).with_entities(NewsletterDelivery.id)
+               .order_by(NewsletterDelivery.id).limit(app.config['NEWSLETTER_BATCH_SIZE'])]
+        if not ids:
+            return []
+        
+        token = secrets.token_hex(16)
+        self._deliveries(NewsletterDelivery.id.in_(ids), due).update({
+            NewsletterDelivery.status: 'sending',
+            NewsletterDelivery.claim_token: token,
+            NewsletterDelivery.locked_until: now + timedelta(seconds=app.config['NEWSLETTER_CLAIM_TIMEOUT'])
+        }, synchronize_session=False)
+        db.session.commit()
+        return NewsletterDelivery.query.filter_by(claim_token=token).order_by(NewsletterDelivery.id).all()
+    
+    def _send(self, message):
+        # Once the server is unreachable, fail the rest of the batch without waiting for the pacer
+        if self.unavailable:
+            raise self.unavailable
+        self.pacer.wait()
+        try:
+            self.pool.send(message)
+        except SmtpUnavailable as e:
+            self.unavailable = e
+            raise
+    
+    def send_batch(self, executor, rendered, rows):
+        """Send claimed deliveries concurrently and commit every outcome together"""
+        active = set(db.session.execute(db.select(Newsletter.id).where(
+            Newsletter.id.in_([row.subscriber_id for row in rows]), Newsletter.is_active.is_(True))).scalars())
+        futures = []
+        for row in rows:
+            if row.subscriber_id not in active:
+                row.status = 'skipped'  # unsubscribed after the campaign started
+                continue
+            try:
+                message = build_newsletter_message(rendered, row.email, row.unsubscribe_token)
+            except Exception as e:
+                # A message that cannot be built fails alone instead of stranding the claimed batch
+                row.attempts += 1
+                row.status = 'failed'
+                row.last_error = str(e)[:500]
+                continue
+            futures.append((row, executor.submit(self._send, message)))
+        
+        now = datetime.utcnow()
+        for row, future in futures:
+            try:
+                future.result()
+                row.status = 'sent'
+                row.sent_at = datetime.utcnow()
+            except SmtpUnavailable:
+                # Not attempted: release without counting an attempt
+                row.status = 'pending'
+                row.next_attempt_at = now + timedelta(seconds=60)
+            except Exception as e:
+                row.attempts += 1
+                row.last_error = str(e)[:500]
+                if isinstance(e, PermanentSendError) or row.attempts >= app.config['NEWSLETTER_MAX_ATTEMPTS']:
+                    row.status = 'failed'
+                else:
+                    row.status = 'pending'
+                    row.next_attempt_at = now + timedelta(seconds=60 * 2 ** (row.attempts - 1))
+        for row in rows:
+            row.claim_token = None
+            row.locked_until = None
+            newsletter_messages.labels(row.status).inc()
+        db.session.commit()
+        if self.unavailable:
+            raise self.unavailable
+    
+    def run(self):
+        """Send until no deliveries remain (waiting out retry delays) or the campaign is cancelled"""
+        campaign = db.session.get(NewsletterCampaign, self.campaign_id)
+        if campaign is None:
+            raise ValueError(f"Unknown campaign {self.campaign_id}")
+        if campaign.status in ('sent', 'cancelled'):
+            return campaign_progress(self.campaign_id)
+        if campaign.status in ('draft', 'queued'):
+            start_campaign(campaign)
+            db.session.commit()
+        rendered = render_campaign(campaign)
+        self._abandon_stale(datetime.utcnow())
+        
+        with ThreadPoolExecutor(max_workers=app.config['NEWSLETTER_CONNECTIONS'],
+                                thread_name_prefix='newsletter-smtp') as executor:
+            try:
+                while db.session.execute(db.select(NewsletterCampaign.status)
+                                         .where(NewsletterCampaign.id == self.campaign_id)).scalar() == 'sending':
+                    now = datetime.utcnow()
+                    rows = self._claim(now)
+                    if rows:
+                        self.send_batch(executor, rendered, rows)
+                        continue
+                    next_attempt = self._deliveries(NewsletterDelivery.status == 'pending').with_entities(
+                        db.func.min(NewsletterDelivery.next_attempt_at)).scalar()
+                    db.session.rollback()
+                    if next_attempt is None:
+                        break
+                    time.sleep(min(max((next_attempt - now).total_seconds(), 1), 60))
+            finally:
+                self.pool.close()
+        
+        # Another sender may still hold claimed batches; it finishes the campaign in that case
+        if not self._deliveries(NewsletterDelivery.status.in_(('pending', 'sending'))).count():
+            NewsletterCampaign.query.filter_by(id=self.campaign_id, status='sending').update({
+                NewsletterCampaign.status: 'sent',
+                NewsletterCampaign.finished_at: datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+        return campaign_progress(self.campaign_id)
+
+campaign_threads = {}
+campaign_threads_lock = threading.Lock()
+
+def run_campaign_thread(campaign_id):
+    with app.app_context():
+        try:
+            progress = CampaignSender(campaign_id).run()
+            app.logger.info(f"Newsletter campaign {campaign_id} {progress['status']}: "
+                            f"{progress['sent']} sent, {progress['failed']} failed")
+        except Exception as e:
+            app.logger.error(f"Newsletter campaign {campaign_id} stopped: {e}")
+            db.session.rollback()
+
+def start_campaign_sender(campaign_id):
+    """Send a campaign from a background thread in this process, unless one is already running"""
+    if app.config['NEWSLETTER_SENDER'] != 'thread':
+        return
+    with campaign_threads_lock:
+        thread = campaign_threads.get(campaign_id)
+        if thread and thread.is_alive():
+            return
+        thread = threading.Thread(target=run_campaign_thread, args=(campaign_id,),
+                                  name=f"newsletter-{campaign_id}", daemon=True)
+        campaign_threads[campaign_id] = thread
+        thread.start()
+
+@app.route('/admin/newsletter/campaigns', methods=['POST'])
+@admin_required
+def create_newsletter_campaign():
+    """Create a draft campaign from JSON {"subject", "body_text", "body_html"?}; send X-CSRF-Token.
+    
+    Bodies may place {unsubscribe_url}; otherwise an unsubscribe footer is appended.
+    """
+    if not csrf_token_valid():
+        return jsonify({'error': 'Security validation failed'}), 400
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    fields = {name: payload.get(name) for name in ('subject', 'body_text', 'body_html')}
+    if any(value is not None and not isinstance(value, str) for value in fields.values()):
+        return jsonify({'error': 'subject, body_text and body_html must be strings'}), 400
+    subject = (fields['subject'] or '').strip()
+    body_text = fields['body_text'] or ''
+    if not subject or len(subject) > 200 or not body_text.strip():
+        return jsonify({'error': 'subject (up to 200 characters) and body_text are required'}), 400
+    if '\r' in subject or '\n' in subject:
+        return jsonify({'error': 'subject must be a single line'}), 400
+    
     try:
-        message = f"""
-🔔 NEW ORDER - Ntandostore
-
-📦 Service: {order_data.get('service', 'Unknown')}
-💰 Amount: ${order_data.get('amount', 0.00)}
+        campaign = NewsletterCampaign(subject=subject, body_text=body_text, body_html=fields['body_html'] or None)
+        db.session.add(campaign)
+        db.session.commit()
+    except Exception as e:
+        app.logger.error(f"Create campaign error: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Could not create campaign'}), 500
+    return jsonify(campaign_progress(campaign.id)), 201
 
-👤 Customer Details:
-Name: {order_data.get('customer_name', 'N/A')}
-Email: {order_data.get('customer_email', 'N/A')}
-Phone: {order_data.get('customer_phone', 'N/A')}
+@app.route('/admin/newsletter/campaigns/<int:campaign_id>')
+@admin_required
+def newsletter_campaign_status(campaign_id):
+    if not db.session.get(NewsletterCampaign, campaign_id):
+        return jsonify({'error': 'Campaign not found'}), 404
+    return jsonify(campaign_progress(campaign_id))
 
-📝 Details: {order_data.get('details', 'No details provided')}
+@app.route('/admin/newsletter/campaigns/<int:campaign_id>/send', methods=['POST'])
+@admin_required
+def send_newsletter_campaign(campaign_id):
+    """Queue a draft campaign, or resume an interrupted one"""
+    if not csrf_token_valid():
+        return jsonify({'error': 'Security validation failed'}), 400
+    if not app.config['SMTP_HOST']:
+        return jsonify({'error': 'SMTP_HOST is not configured'}), 503
+    campaign = db.session.get(NewsletterCampaign, campaign_id)
+    if not campaign:
+        return jsonify({'error': 'Campaign not found'}), 404
+    if campaign.status in ('sent', 'cancelled'):
+        return jsonify({'error': f"Campaign is already {campaign.status}"}), 409
+    if campaign.status == 'draft':
+        campaign.status = 'queued'
+        db.session.commit()
+    start_campaign_sender(campaign_id)
+    return jsonify(campaign_progress(campaign_id)), 202
 
-🕒 Order Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-🔍 Tracking: {order_data.get('tracking_number', 'N/A')}
+@app.route('/admin/newsletter/campaigns/<int:campaign_id>/cancel', methods=['POST'])
+@admin_required
+def cancel_newsletter_campaign(campaign_id):
+    """Stop a campaign after the batch in flight; deliveries not yet sent stay pending"""
+    if not csrf_token_valid():
+        return jsonify({'error': 'Security validation failed'}), 400
+    updated = NewsletterCampaign.query.filter(
+        NewsletterCampaign.id == campaign_id, NewsletterCampaign.status.in_(('draft', 'queued', 'sending'))
+    ).update({NewsletterCampaign.status: 'cancelled', NewsletterCampaign.finished_at: datetime.utcnow()},
+             synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        return jsonify({'error': 'Campaign not found or already finished'}), 409
+    return jsonify(campaign_progress(campaign_id))
 
-Payment Number: +263786831091 (EcoCash/Innbucks)
-        """
-        
-        app.logger.info(f"WhatsApp notification to +263718456744: {message}")
-        # Here you would integrate with actual WhatsApp API
-        return True
-    except Exception as e:
-        app.logger.error(f"WhatsApp notification error: {e}")
-        return False
+@app.cli.command('send-newsletter')
+@click.argument('campaign_id', type=int, required=False)
+def send_newsletter_command(campaign_id):
+    """Send (or resume) a campaign in the foreground; without an id, every queued or sending campaign"""
+    if not app.config['SMTP_HOST']:
+        print("⚠ SMTP_HOST is not configured")
+        raise SystemExit(1)
+    if campaign_id is None:
+        campaign_ids = list(db.session.execute(db.select(NewsletterCampaign.id).where(
+            NewsletterCampaign.status.in_(('queued', 'sending'))).order_by(NewsletterCampaign.id)).scalars())
+    else:
+        campaign_ids = [campaign_id]
+    for campaign_id in campaign_ids:
+        try:
+            progress = CampaignSender(campaign_id).run()
+        except (ValueError, SmtpUnavailable) as e:
+            print(f"⚠ Campaign {campaign_id}: {e}")
+            raise SystemExit(1)
+        print(f"✓ Campaign {campaign_id} {progress['status']}: {progress['sent']} sent, {progress['failed']} failed, "
+              f"{progress['skipped']} skipped, {progress['unknown']} unknown, {progress['pending']} pending")
 
 # Public Routes
 @app.route('/')
+@cache_page
 def index():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         reviews = Review.query.filter_by(is_approved=True).order_by(Review.created_at.desc()).limit(6).all()
         recent_orders = Order.query.filter_by(status='completed').order_by(Order.completed_date.desc()).limit(10).all()
         return render_template('index.html', 
-                             services=SERVICES, 
-                             company_logo=company_logo,
+                             services=SERVICE_CATALOG.services, 
                              reviews=reviews,
                              recent_orders=recent_orders)
     except Exception as e:
         app.logger.error(f"Error in index route: {e}")
+        g.no_page_cache = True
         return render_template('index.html', 
-                             services=SERVICES, 
-                             company_logo=None,
+                             services=SERVICE_CATALOG.services, 
                              reviews=[],
                              recent_orders=[])
 
 @app.route('/services')
+@cache_page
 def services():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         category = request.args.get('category', 'all')
         
-        if category == 'all':
-            filtered_services = SERVICES
-        else:
-            filtered_services = {k: v for k, v in SERVICES.items() if v['category'] == category}
-        
-        categories = {}
-        for service_id, service in SERVICES.items():
-            cat = service['category']
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append((service_id, service))
-        
         return render_template('services.html', 
-                             services=filtered_services,
-                             categories=categories,
-                             current_category=category,
-                             company_logo=company_logo)
+                             services=SERVICE_CATALOG.in_category(category),
+                             services_json=SERVICE_CATALOG.script_json(category),
+                             categories=SERVICE_CATALOG.categories,
+                             current_category=category)
     except Exception as e:
         app.logger.error(f"Error in services route: {e}")
+        g.no_page_cache = True
         return render_template('services.html', 
-                             services=SERVICES, 
+                             services=SERVICE_CATALOG.services, 
+                             services_json=SERVICE_CATALOG.script_json(),
                              categories={},
-                             current_category='all',
-                             company_logo=None)
+                             current_category='all')
+
+@app.route('/api/services')
+def services_api():
+    body, etag = SERVICE_CATALOG.json(request.args.get('category', 'all'))
+    if body is None:
+        return jsonify({'error': 'Unknown category'}), 404
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
 
 @app.route('/gallery')
 def gallery():
     try:
-        logos = Logo.query.order_by(Logo.upload_date.desc()).all()
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-        return render_template('gallery.html', logos=logos, company_logo=company_logo)
+        logos, next_cursor = get_gallery_page()
+        return render_template('gallery.html',
+                             logos=logos,
+                             logo_count=get_gallery_count(),
+                             next_cursor=next_cursor)
     except Exception as e:
         app.logger.error(f"Error in gallery route: {e}")
-        return render_template('gallery.html', logos=[], company_logo=None)
+        return render_template('gallery.html', logos=[], logo_count=0, next_cursor=None)
+
+@app.route('/api/gallery')
+def gallery_feed():
+    """JSON feed of portfolio logos for infinite scroll"""
+    try:
+        limit = request.args.get('limit', app.config['GALLERY_PAGE_SIZE'], type=int)
+        limit = max(1, min(limit, app.config['GALLERY_MAX_PAGE_SIZE']))
+        logos, next_cursor = get_gallery_page(request.args.get('after'), limit)
+        return jsonify({
+            'items': [serialize_logo(logo) for logo in logos],
+            'next': next_cursor
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error in gallery feed: {e}")
+        return jsonify({'error': 'Could not load gallery'}), 500
 
 @app.route('/testimonials')
+@cache_page
 def testimonials():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         reviews = Review.query.filter_by(is_approved=True).order_by(Review.created_at.desc()).all()
-        return render_template('testimonials.html', reviews=reviews, company_logo=company_logo)
+        return render_template('testimonials.html', reviews=reviews)
     except Exception as e:
         app.logger.error(f"Error in testimonials route: {e}")
-        return render_template('testimonials.html', reviews=[], company_logo=None)
+        return render_template('testimonials.html', reviews=[])
 
 @app.route('/faq')
+@cache_page
 def faq():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-        return render_template('faq.html', company_logo=company_logo)
+        return render_template('faq.html')
     except Exception as e:
         app.logger.error(f"Error in FAQ route: {e}")
-        return render_template('faq.html', company_logo=None)
+        return render_template('faq.html')
 
 @app.route('/privacy')
+@cache_page
 def privacy():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-        return render_template('privacy.html', company_logo=company_logo)
+        return render_template('privacy.html')
     except Exception as e:
         app.logger.error(f"Error in privacy route: {e}")
-        return render_template('privacy.html', company_logo=None)
+        return render_template('privacy.html')
 
 @app.route('/refund')
+@cache_page
 def refund():
     try:
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-        return render_template('refund.html', company_logo=company_logo)
+        return render_template('refund.html')
     except Exception as e:
         app.logger.error(f"Error in refund route: {e}")
-        return render_template('refund.html', company_logo=None)
+        return render_template('refund.html')
 
 @app.route('/terms_pdf')
 def terms_pdf():
@@ -436,24 +2423,20 @@ def terms_pdf():
 
 @app.route('/order/<service_id>')
 def order(service_id):
-    if service_id not in SERVICES:
+    service = SERVICE_CATALOG.get(service_id)
+    if service is None:
         flash('Service not found', 'error')
         return redirect(url_for('index'))
     
     try:
-        service = SERVICES[service_id]
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         return render_template('order.html', 
                              service=service, 
-                             service_id=service_id, 
-                             company_logo=company_logo)
+                             service_id=service_id)
     except Exception as e:
         app.logger.error(f"Error in order route: {e}")
-        service = SERVICES[service_id]
         return render_template('order.html', 
                              service=service, 
-                             service_id=service_id, 
-                             company_logo=None)
+                             service_id=service_id)
 
 @app.route('/submit_order', methods=['POST'])
 def submit_order():
@@ -468,7 +2451,7 @@ def submit_order():
         details = sanitize_input(request.form.get('details', ''))
         
         # Validate inputs
-        if not service_id or service_id not in SERVICES:
+        if not service_id or service_id not in SERVICE_CATALOG:
             flash('Invalid service selected', 'error')
             return redirect(url_for('index'))
         
@@ -484,7 +2467,7 @@ def submit_order():
             flash('Please enter a valid phone number', 'error')
             return redirect(url_for('order', service_id=service_id))
         
-        service = SERVICES[service_id]
+        service = SERVICE_CATALOG.get(service_id)
         
         # Generate tracking number and estimated completion
         tracking_number = generate_tracking_number()
@@ -502,9 +2485,8 @@ def submit_order():
             tracking_number=tracking_number
         )
         db.session.add(order)
-        db.session.commit()
         
-        # Send WhatsApp notification
+        # Queue WhatsApp notification in the same transaction as the order
         order_data = {
             'service': service['name'],
             'amount': service['price'],
@@ -514,7 +2496,15 @@ def submit_order():
             'details': details,
             'tracking_number': tracking_number
         }
-        send_whatsapp_notification(order_data)
+        queue_notification(order_data)
+        db.session.flush()
+        record_order_change(after=rollup_fields(order))
+        publish_event('order_created', order_id=order.id, tracking_number=tracking_number,
+                      service=service['name'], amount=service['price'], customer_name=customer_name)
+        db.session.commit()
+        bump_cache_version('orders')
+        orders_created.labels(service_id).inc()
+        notify_dispatcher()
         
         flash(f'Order submitted successfully! Tracking number: {tracking_number}. Please make payment to +263786831091 (EcoCash/Innbucks)', 'success')
         return redirect(url_for('index'))
@@ -560,9 +2550,8 @@ def contact_submit():
             ip_address=client_ip
         )
         db.session.add(contact)
-        db.session.commit()
         
-        # Send notification
+        # Queue notification in the same transaction as the message
         notification_data = {
             'service': 'Contact Form',
             'amount': 0.00,
@@ -571,7 +2560,12 @@ def contact_submit():
             'customer_phone': 'N/A',
             'details': f"Service Interest: {service}\nMessage: {message}"
         }
-        send_whatsapp_notification(notification_data)
+        queue_notification(notification_data)
+        db.session.flush()
+        publish_event('contact_message', message_id=contact.id, name=name, service=service)
+        db.session.commit()
+        bump_cache_version('contact_messages')
+        notify_dispatcher()
         
         flash('Thank you for contacting us! We will get back to you soon.', 'success')
         return redirect(url_for('index') + '#contact')
@@ -619,8 +2613,9 @@ def subscribe():
         flash('Error subscribing. Please try again.', 'error')
         return redirect(url_for('index'))
 
-@app.route('/unsubscribe/<token>')
+@app.route('/unsubscribe/<token>', methods=['GET', 'POST'])
 def unsubscribe(token):
+    """The newsletter footer link; mail clients POST here for one-click unsubscribe (RFC 8058)"""
     try:
         subscriber = Newsletter.query.filter_by(unsubscribe_token=token).first()
         if subscriber:
@@ -639,18 +2634,368 @@ def unsubscribe(token):
 def track_order(tracking_number):
     try:
         order = Order.query.filter_by(tracking_number=tracking_number).first()
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         
         if not order:
             flash('Order not found. Please check your tracking number.', 'error')
             return redirect(url_for('index'))
         
-        return render_template('track.html', order=order, company_logo=company_logo)
+        return render_template('track.html', order=order)
     except Exception as e:
         app.logger.error(f"Error tracking order: {e}")
         flash('Error tracking order. Please try again.', 'error')
         return redirect(url_for('index'))
 
+# Admin login protection
+class SlidingWindowLimiter:
+    """In-memory sliding-window log of attempts per key"""
+    
+    def __init__(self, limit_setting, window_setting, max_keys=10000):
+        self.limit_setting = limit_setting
+        self.window_setting = window_setting
+        self.max_keys = max_keys
+        self._hits = {}
+        self._lock = threading.Lock()
+    
+    def hit(self, key):
+        """Record an attempt for key; return seconds until it is allowed, or 0 if it is allowed now"""
+        limit = app.config[self.limit_setting]
+        if limit <= 0:
+            return 0
+        window = app.config[self.window_setting]
+        now = time.monotonic()
+        
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                if len(self._hits) >= self.max_keys:
+                    self._prune(now - window)
+                hits = self._hits[key] = []
+            while hits and hits[0] <= now - window:
+                hits.pop(0)
+            if len(hits) >= limit:
+                return max(1, int(hits[0] + window - now) + 1)
+            hits.append(now)
+        return 0
+    
+    def retry_after(self, key):
+        """Seconds until key may attempt again, without recording an attempt"""
+        limit = app.config[self.limit_setting]
+        if limit <= 0:
+            return 0
+        window = app.config[self.window_setting]
+        now = time.monotonic()
+        with self._lock:
+            live = [hit for hit in self._hits.get(key, ()) if hit > now - window]
+            if len(live) >= limit:
+                return max(1, int(live[0] + window - now) + 1)
+        return 0
+    
+    def recent(self, key):
+        """Number of attempts recorded for key within the window"""
+        window = app.config[self.window_setting]
+        now = time.monotonic()
+        with self._lock:
+            return sum(hit > now - window for hit in self._hits.get(key, ()))
+    
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+    
+    def _prune(self, cutoff):
+        for key in [key for key, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[key]
+        # Still full of live keys: drop the oldest ones
+        while len(self._hits) >= self.max_keys:
+            del self._hits[next(iter(self._hits))]
+
+login_ip_limiter = SlidingWindowLimiter('LOGIN_RATE_LIMIT_IP', 'LOGIN_RATE_WINDOW')
+# Failed logins per username and per address. A username's failures only throttle addresses that
+# have failed themselves, so guessing against an account cannot lock out its owner.
+login_user_limiter = SlidingWindowLimiter('LOGIN_RATE_LIMIT_USER', 'LOGIN_RATE_WINDOW')
+login_failed_ip_limiter = SlidingWindowLimiter('LOGIN_RATE_LIMIT_USER', 'LOGIN_RATE_WINDOW')
+# Hashes per (address, username); password_slots still caps the total hashing per worker
+login_hash_limiter = SlidingWindowLimiter('LOGIN_HASH_RATE_LIMIT', 'LOGIN_HASH_RATE_WINDOW')
+
+# Password hashing runs on a small pool; callers beyond the pending cap are turned away
+password_executor = native_thread_executor(max(1, app.config['LOGIN_HASH_WORKERS']), 'password-hash')
+password_slots = threading.BoundedSemaphore(max(1, app.config['LOGIN_HASH_MAX_PENDING']))
+
+class PasswordCheckBusy(Exception):
+    pass
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    return generate_password_hash(secrets.token_urlsafe(16))
+
+def verify_password(password_hash, password):
+    """Check a password on the hash pool; unknown users hash a dummy so timing does not leak them.
+    
+    The caller blocks until its hash finishes; the pool limits how many run at once per process.
+    """
+    if not password_slots.acquire(blocking=False):
+        raise PasswordCheckBusy()
+    try:
+        future = password_executor.submit(check_password_hash, password_hash or _dummy_password_hash(), password)
+        return future.result() and password_hash is not None
+    finally:
+        password_slots.release()
+
+def get_client_ip():
+    """Client address as seen by the outermost trusted proxy"""
+    forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+    proxies = app.config['TRUSTED_PROXY_COUNT']
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.remote_addr or 'unknown'
+
+# Public order tracking API - customers poll it while they wait, scrapers probe it for numbers.
+# Lookups are limited per IP, unknown numbers count against a much smaller budget, and both
+# known and unknown numbers are cached so repeated polling stays off the orders table.
+TRACKING_NUMBER_RE = re.compile(r'^NTD-(\d{8})-[0-9A-F]{6}$')
+TRACKING_COLUMNS = (Order.tracking_number, Order.service, Order.status, Order.payment_status, Order.amount,
+                    Order.order_date, Order.estimated_completion, Order.completed_date)
+
+tracking_cache = VersionedCache('tracking', 'TRACKING_CACHE_TTL', max_entries=4096)
+tracking_miss_cache = VersionedCache('tracking_misses', 'TRACKING_MISS_CACHE_TTL', max_entries=4096)
+tracking_ip_limiter = SlidingWindowLimiter('TRACKING_RATE_LIMIT', 'TRACKING_RATE_WINDOW')
+tracking_miss_limiter = SlidingWindowLimiter('TRACKING_MISS_RATE_LIMIT', 'TRACKING_MISS_RATE_WINDOW')
+
+def valid_tracking_number(tracking_number):
+    """Reject numbers generate_tracking_number() could not have issued, without touching the database"""
+    match = TRACKING_NUMBER_RE.match(tracking_number)
+    if not match:
+        return False
+    try:
+        issued = datetime.strptime(match.group(1), '%Y%m%d')
+    except ValueError:
+        return False
+    return issued <= datetime.now() + timedelta(days=1)
+
+def load_tracking(tracking_number):
+    """Return the cached (body, etag) for a tracking number, or None if no order has it"""
+    cached, version = tracking_cache.lookup(tracking_number)
+    if cached is not MISSING:
+        return cached
+    missed, miss_version = tracking_miss_cache.lookup(tracking_number)
+    if missed is not MISSING:
+        return None
+    
+    row = db.session.query(*TRACKING_COLUMNS).filter(Order.tracking_number == tracking_number).first()
+    if row is None:
+        tracking_miss_cache.store(tracking_number, True, miss_version)
+        return None
+    body = json.dumps({key: value.isoformat() if isinstance(value, datetime) else value
+                       for key, value in row._asdict().items()}, separators=(',', ':')).encode()
+    entry = (body, hashlib.sha256(body).hexdigest()[:32])
+    tracking_cache.store(tracking_number, entry, version)
+    return entry
+
+def _too_many_tracking_requests(retry_after):
+    response = jsonify({'error': 'Too many tracking requests. Please try again later.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.route('/api/track/<tracking_number>')
+def track_order_api(tracking_number):
+    """Order status as JSON, for the tracking widget and customers polling for updates"""
+    client_ip = get_client_ip()
+    retry_after = tracking_miss_limiter.retry_after(client_ip) or tracking_ip_limiter.hit(client_ip)
+    if retry_after:
+        return _too_many_tracking_requests(retry_after)
+    
+    tracking_number = tracking_number.strip().upper()
+    entry = None
+    if valid_tracking_number(tracking_number):
+        try:
+            entry = load_tracking(tracking_number)
+        except Exception as e:
+            app.logger.error(f"Error tracking order: {e}")
+            db.session.rollback()
+            return jsonify({'error': 'Error tracking order. Please try again.'}), 500
+    
+    if entry is None:
+        # Enumeration shows up as a run of misses; once over budget the IP is refused before any lookup
+        retry_after = tracking_miss_limiter.hit(client_ip)
+        if retry_after:
+            return _too_many_tracking_requests(retry_after)
+        return jsonify({'error': 'Order not found. Please check your tracking number.'}), 404
+    
+    body, etag = entry
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+# Live updates - events are held on the session and published only if it commits. With
+# Postgres they travel through NOTIFY, so the listener thread in every worker receives them;
+# otherwise they reach the clients connected to the worker that committed.
+EVENT_CHANNEL = 'ntandostore_events'
+NOTIFY_PAYLOAD_LIMIT = 7500  # Postgres rejects NOTIFY payloads of 8000 bytes or more
+
+def publish_event(kind, **data):
+    """Push an event to live clients once the current transaction commits"""
+    db.session.info.setdefault('pending_events', []).append(dict(data, type=kind))
+
+def events_use_notify(engine):
+    transport = app.config['EVENT_TRANSPORT']
+    if transport == 'auto':
+        return engine.dialect.name == 'postgresql'
+    return transport == 'postgres'
+
+@event.listens_for(Session, 'before_commit')
+def _notify_pending_events(session):
+    events = session.info.get('pending_events')
+    if events and events_use_notify(session.get_bind()):
+        connection = session.connection()
+        for payload in pack_event_payloads(events):
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'),
+                               {'channel': EVENT_CHANNEL, 'payload': payload})
+
+def pack_event_payloads(events):
+    """Group events into JSON arrays that each fit in one NOTIFY, so bulk changes need few statements"""
+    payloads, batch, size = [], [], 2
+    for item in events:
+        encoded = json.dumps(item, default=str)  # ASCII-only, so characters are bytes
+        if batch and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(f"[{','.join(batch)}]")
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        payloads.append(f"[{','.join(batch)}]")
+    return payloads
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_pending_events(session):
+    events = session.info.pop('pending_events', None)
+    if events and not events_use_notify(session.get_bind()):
+        for item in events:
+            event_broker.dispatch(item)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending_events(session):
+    session.info.pop('pending_events', None)
+
+class EventBroker:
+    """Fans live events out to the SSE clients connected to this worker"""
+    
+    def __init__(self):
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._listener = None
+    
+    def has_capacity(self):
+        with self._lock:
+            return len(self._clients) < app.config['SSE_MAX_CONNECTIONS']
+    
+    def subscribe(self):
+        """Return an event queue for a new client, or None when this worker is at capacity"""
+        with self._lock:
+            if len(self._clients) >= app.config['SSE_MAX_CONNECTIONS']:
+                return None
+            client = queue.Queue(maxsize=100)
+            self._clients.add(client)
+            if self._listener is None and events_use_notify(db.engine):
+                self._listener = threading.Thread(target=self._listen, args=(db.engine,),
+                                                  daemon=True, name='event-listener')
+                self._listener.start()
+        return client
+    
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+    
+    def dispatch(self, item):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait(item)
+            except queue.Full:
+                pass  # a stalled client misses events rather than growing without bound
+    
+    def _listen(self, engine):
+        """Relay NOTIFY payloads to this worker's clients on a dedicated connection, reconnecting on failure"""
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        while True:
+            connection = None
+            try:
+                connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {EVENT_CHANNEL}')
+                while True:
+                    if select.select([connection], [], [], 60) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        for item in json.loads(connection.notifies.pop(0).payload):
+                            self.dispatch(item)
+            except Exception as e:
+                app.logger.error(f"Event listener error: {e}")
+                time.sleep(5)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+event_broker = EventBroker()
+
+def _format_sse(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/events')
+def events():
+    """Server-sent events: every update for admins, one order's status changes for customers"""
+    is_admin = bool(session.get('admin_logged_in'))
+    tracking_number = request.args.get('track', '').strip().upper()
+    if not is_admin:
+        client_ip = get_client_ip()
+        retry_after = tracking_miss_limiter.retry_after(client_ip) or tracking_ip_limiter.hit(client_ip)
+        if retry_after:
+            return _too_many_tracking_requests(retry_after)
+        # Only real orders may hold a stream open
+        if not valid_tracking_number(tracking_number) or load_tracking(tracking_number) is None:
+            tracking_miss_limiter.hit(client_ip)
+            return jsonify({'error': 'Order not found. Please check your tracking number.'}), 404
+    
+    if not event_broker.has_capacity():
+        response = jsonify({'error': 'Live updates are busy. Please try again shortly.'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(app.config['SSE_RETRY_MS'] // 1000)
+        return response
+    
+    # Not wrapped in stream_with_context: the request (and its DB session) ends before streaming starts.
+    # The slot is taken inside the generator so a response that is never iterated never holds one.
+    def stream():
+        with app.app_context():  # subscribe() may start the LISTEN thread from db.engine
+            client = event_broker.subscribe()
+        try:
+            yield f"retry: {app.config['SSE_RETRY_MS']}\n\n"
+            if client is None:
+                return  # filled up since the capacity check; the browser retries after the delay above
+            deadline = time.monotonic() + app.config['SSE_MAX_DURATION']
+            while time.monotonic() < deadline:
+                try:
+                    item = client.get(timeout=app.config['SSE_HEARTBEAT'])
+                except queue.Empty:
+                    yield ': keepalive\n\n'  # also how a closed connection is noticed
+                    continue
+                if is_admin:
+                    yield _format_sse(item['type'], item)
+                elif item['type'] == 'order_status' and item['tracking_number'] == tracking_number:
+                    yield _format_sse('order_status', {'tracking_number': tracking_number, 'status': item['status']})
+        finally:
+            event_broker.unsubscribe(client)
+    
+    response = app.response_class(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # stop nginx-style proxies from buffering the stream
+    return response
+
 # Admin Routes
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -663,6 +3008,20 @@ def admin_login():
                 flash('Please enter username and password', 'error')
                 return render_template('admin_login.html')
             
+            # Throttle before touching the database or hashing anything
+            client_ip = get_client_ip()
+            user_key = username.lower()
+            retry_after = login_ip_limiter.hit(client_ip)
+            if not retry_after and login_failed_ip_limiter.recent(client_ip):
+                retry_after = login_user_limiter.retry_after(user_key)
+            if retry_after:
+                flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'error')
+                response = make_response(render_template('admin_login.html'), 429)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            if login_hash_limiter.hit((client_ip, user_key)):
+                raise PasswordCheckBusy()
+            
             admin = Admin.query.filter_by(username=username).first()
             
             # Check if account is locked
@@ -670,7 +3029,10 @@ def admin_login():
                 flash('Account is locked. Please try again later.', 'error')
                 return render_template('admin_login.html')
             
-            if admin and check_password_hash(admin.password, password):
+            if verify_password(admin.password if admin else None, password):
+                login_user_limiter.reset(user_key)
+                login_failed_ip_limiter.reset(client_ip)
+                
                 # Reset failed attempts
                 admin.failed_login_attempts = 0
                 admin.locked_until = None
@@ -683,6 +3045,8 @@ def admin_login():
                 flash('Login successful!', 'success')
                 return redirect(url_for('admin_dashboard'))
             else:
+                login_user_limiter.hit(user_key)
+                login_failed_ip_limiter.hit(client_ip)
                 # Increment failed attempts
                 if admin:
                     admin.failed_login_attempts += 1
@@ -695,6 +3059,11 @@ def admin_login():
                     db.session.commit()
                 else:
                     flash('Invalid credentials.', 'error')
+        except PasswordCheckBusy:
+            flash('The server is busy. Please try again in a moment.', 'error')
+            response = make_response(render_template('admin_login.html'), 503)
+            response.headers['Retry-After'] = '5'
+            return response
         except Exception as e:
             app.logger.error(f"Login error: {e}")
             flash('Login error. Please try again.', 'error')
@@ -707,38 +3076,15 @@ def admin_dashboard():
     try:
         logos = Logo.query.order_by(Logo.upload_date.desc()).all()
         orders = Order.query.order_by(Order.order_date.desc()).limit(20).all()
-        company_logo = CompanyLogo.query.filter_by(is_active=True).first()
         contact_messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).limit(10).all()
         
         # Statistics
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
-        in_progress_orders = Order.query.filter_by(status='in-progress').count()
-        completed_orders = Order.query.filter_by(status='completed').count()
-        total_revenue = db.session.query(db.func.sum(Order.amount)).filter_by(status='completed').scalar() or 0
-        
-        # Monthly revenue
-        this_month = datetime.utcnow().replace(day=1)
-        monthly_revenue = db.session.query(db.func.sum(Order.amount)).filter(
-            Order.status == 'completed',
-            Order.completed_date >= this_month
-        ).scalar() or 0
-        
-        stats = {
-            'total_orders': total_orders,
-            'pending_orders': pending_orders,
-            'in_progress_orders': in_progress_orders,
-            'completed_orders': completed_orders,
-            'total_revenue': total_revenue,
-            'monthly_revenue': monthly_revenue,
-            'new_messages': ContactMessage.query.filter_by(status='new').count()
-        }
+        stats = get_dashboard_stats()
         
         return render_template('admin_dashboard.html', 
                              logos=logos, 
                              orders=orders,
                              contact_messages=contact_messages,
-                             company_logo=company_logo,
                              stats=stats)
     except Exception as e:
         app.logger.error(f"Dashboard error: {e}")
@@ -746,9 +3092,370 @@ def admin_dashboard():
                              logos=[], 
                              orders=[],
                              contact_messages=[],
-                             company_logo=None,
                              stats={})
 
+@app.route('/admin/api/stats')
+@admin_required
+def admin_stats_api():
+    """Dashboard statistics as JSON for in-place refresh"""
+    try:
+        return jsonify(get_dashboard_stats())
+    except Exception as e:
+        app.logger.error(f"Stats API error: {e}")
+        return jsonify({'error': 'Could not load statistics'}), 500
+
+analytics_cache = VersionedCache('analytics', 'STATS_CACHE_TTL', max_entries=64, depends_on=('orders',))
+
+def next_rollup_bucket(period, bucket):
+    if period == 'day':
+        return bucket + timedelta(days=1)
+    return bucket.replace(year=bucket.year + 1, month=1) if bucket.month == 12 else bucket.replace(month=bucket.month + 1)
+
+def rollup_buckets(period, start, end):
+    """Every bucket from start to end inclusive"""
+    buckets, bucket = [], rollup_bucket(period, start)
+    while bucket <= end:
+        buckets.append(bucket)
+        bucket = next_rollup_bucket(period, bucket)
+    return buckets
+
+def compute_order_series(period, start, end, service_id=None):
+    """Orders, revenue and completion time per bucket, read from the rollups only"""
+    buckets = rollup_buckets(period, start, end)
+    query = db.select(
+        OrderRollup.bucket, OrderRollup.status,
+        *(db.func.sum(getattr(OrderRollup, measure)) for measure in ROLLUP_MEASURES)
+    ).where(OrderRollup.period == period, OrderRollup.bucket >= buckets[0], OrderRollup.bucket <= buckets[-1])
+    if service_id:
+        query = query.where(OrderRollup.service_id == service_id)
+    
+    series = {bucket: dict(dict.fromkeys(ROLLUP_MEASURES, 0), orders_by_status=dict.fromkeys(ORDER_STATUSES, 0))
+              for bucket in buckets}
+    for row in db.session.execute(query.group_by(OrderRollup.bucket, OrderRollup.status)):
+        point = series[row.bucket]
+        for measure, value in zip(ROLLUP_MEASURES, row[2:]):
+            point[measure] += value or 0
+        point['orders_by_status'][row.status] = point['orders_by_status'].get(row.status, 0) + (row[2] or 0)
+    
+    points = []
+    for bucket, point in series.items():
+        seconds = point.pop('completion_seconds')
+        point.update(bucket=bucket.isoformat(), amount=round(point['amount'], 2), revenue=round(point['revenue'], 2),
+                     avg_completion_hours=round(seconds / point['completions'] / 3600, 2) if point['completions'] else None)
+        points.append(point)
+    return {'period': period, 'start': buckets[0].isoformat(), 'end': buckets[-1].isoformat(),
+            'service_id': service_id, 'series': points}
+
+@app.route('/admin/api/analytics/orders')
+@admin_required
+def order_analytics_api():
+    """Order time series from the rollups: ?period=day|month&start=YYYY-MM-DD&end=YYYY-MM-DD&service_id=
+    
+    Defaults to the last 30 days or 12 months.
+    """
+    period = request.args.get('period', 'day')
+    if period not in ROLLUP_PERIODS:
+        return jsonify({'error': 'period must be day or month'}), 400
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') \
+            else datetime.utcnow().date()
+        default_start = end - timedelta(days=29) if period == 'day' else rollup_bucket('month', end - timedelta(days=334))
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') \
+            else default_start
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    if start > end:
+        return jsonify({'error': 'start must not be after end'}), 400
+    span = (end - start).days + 1 if period == 'day' else (end.year - start.year) * 12 + end.month - start.month + 1
+    if span > app.config['ANALYTICS_MAX_BUCKETS']:
+        return jsonify({'error': f"At most {app.config['ANALYTICS_MAX_BUCKETS']} {period}s per series"}), 400
+    service_id = request.args.get('service_id') or None
+    
+    try:
+        return jsonify(analytics_cache.get((period, start, end, service_id),
+                                           lambda: compute_order_series(period, start, end, service_id)))
+    except Exception as e:
+        app.logger.error(f"Analytics API error: {e}")
+        return jsonify({'error': 'Could not load analytics'}), 500
+
+# Admin exports: dataset -> (model, date column, status column or mapping, exported columns)
+EXPORTS = {
+    'orders': (Order, 'order_date', 'status',
+               ('id', 'tracking_number', 'service', 'service_id', 'customer_name', 'customer_email',
+                'customer_phone', 'details', 'amount', 'status', 'payment_status', 'order_date',
+                'estimated_completion', 'completed_date')),
+    'messages': (ContactMessage, 'created_at', 'status',
+                 ('id', 'name', 'email', 'service', 'message', 'status', 'created_at', 'ip_address')),
+    'subscribers': (Newsletter, 'subscribed_date', {'active': True, 'inactive': False},
+                    ('id', 'email', 'is_active', 'subscribed_date')),
+}
+EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+def parse_export_date(value, end=False):
+    """Parse a YYYY-MM-DD filter; end dates are inclusive"""
+    if not value:
+        return None
+    day = datetime.strptime(value, '%Y-%m-%d')
+    return day + timedelta(days=1) if end else day
+
+def build_export_query(dataset, start=None, end=None, status=None):
+    model, date_column, status_column, columns = EXPORTS[dataset]
+    query = db.select(*(getattr(model, name) for name in columns))
+    
+    if start:
+        query = query.where(getattr(model, date_column) >= start)
+    if end:
+        query = query.where(getattr(model, date_column) < end)
+    if status:
+        if isinstance(status_column, dict):
+            if status not in status_column:
+                raise ValueError(f"Unknown status '{status}'")
+            query = query.where(model.is_active == status_column[status])
+        else:
+            query = query.where(getattr(model, status_column) == status)
+    
+    # yield_per streams rows with a server-side cursor instead of buffering the whole result
+    return query.order_by(model.id).execution_options(yield_per=app.config['EXPORT_BATCH_SIZE'])
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _csv_cell(value):
+    """Export value for a CSV cell; customer text that a spreadsheet would run as a formula is quoted"""
+    value = _export_value(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def iter_export(query, columns, fmt):
+    """Yield the export one batch of rows at a time"""
+    result = db.session.execute(query)
+    try:
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+        
+        for rows in result.partitions():
+            buffer = io.StringIO()
+            if fmt == 'csv':
+                writer = csv.writer(buffer)
+                writer.writerows([_csv_cell(value) for value in row] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps({name: _export_value(value) for name, value in zip(columns, row)}))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+    finally:
+        result.close()
+        db.session.rollback()
+
+# Admin full-text search. Postgres keeps a weighted tsvector in a generated column with a GIN
+# index; SQLite keeps an external-content FTS5 table in sync with triggers. Both index the
+# alphanumeric runs of each column, so emails, phones and tracking numbers match by their parts.
+SEARCH_TABLES = {
+    'orders': {
+        'model': Order,
+        'columns': {'A': ('tracking_number', 'customer_name', 'customer_email', 'customer_phone'),
+                    'B': ('service', 'details')},
+        'fields': ('id', 'tracking_number', 'customer_name', 'customer_email', 'customer_phone',
+                   'service', 'status', 'amount', 'order_date'),
+    },
+    'messages': {
+        'model': ContactMessage,
+        'columns': {'A': ('name', 'email'), 'B': ('service', 'message')},
+        'fields': ('id', 'name', 'email', 'service', 'status', 'created_at', 'message'),
+    },
+    'reviews': {
+        'model': Review,
+        'columns': {'A': ('customer_name',), 'B': ('service', 'review_text')},
+        'fields': ('id', 'customer_name', 'service', 'rating', 'is_approved', 'created_at', 'review_text'),
+    },
+}
+SEARCH_WEIGHTS = {'A': 10.0, 'B': 2.0}  # column weights on SQLite; ts_rank's A/B defaults on Postgres
+SEARCH_SNIPPET_LENGTH = 200
+
+def _search_columns(spec):
+    return [column for weight in ('A', 'B') for column in spec['columns'][weight]]
+
+def _concat_columns(columns):
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+def create_search_indexes():
+    """Create the search index for every SEARCH_TABLES entry on the current database"""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        for spec in SEARCH_TABLES.values():
+            table = spec['model'].__tablename__
+            if dialect == 'postgresql':
+                vector = ' || '.join(
+                    f"setweight(to_tsvector('simple', regexp_replace({_concat_columns(columns)}, "
+                    f"'[^[:alnum:]]+', ' ', 'g')), '{weight}')"
+                    for weight, columns in spec['columns'].items())
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+                                  f'GENERATED ALWAYS AS ({vector}) STORED'))
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING GIN (search_vector)'))
+            elif dialect == 'sqlite':
+                columns = _search_columns(spec)
+                column_list = ', '.join(columns)
+                new_values = ', '.join(f'new.{column}' for column in columns)
+                old_values = ', '.join(f'old.{column}' for column in columns)
+                conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({column_list}, "
+                                  f"content='{table}', content_rowid='id', prefix='2 3')"))
+                conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+                                  f"INSERT INTO {table}_fts(rowid, {column_list}) VALUES (new.id, {new_values}); END"))
+                conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+                                  f"INSERT INTO {table}_fts({table}_fts, rowid, {column_list}) "
+                                  f"VALUES ('delete', old.id, {old_values}); END"))
+                # Only changes to indexed columns touch the index; status updates do not
+                conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {column_list} "
+                                  f"ON {table} BEGIN "
+                                  f"INSERT INTO {table}_fts({table}_fts, rowid, {column_list}) "
+                                  f"VALUES ('delete', old.id, {old_values}); "
+                                  f"INSERT INTO {table}_fts(rowid, {column_list}) VALUES (new.id, {new_values}); END"))
+                conn.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+
+def search_terms(value, minimum=2):
+    """Lower-cased alphanumeric words, tokenized like the indexes; shorter words are dropped"""
+    return [word for word in re.findall(r'[^\W_]+', value.lower()) if len(word) >= minimum]
+
+def _fts_candidates(table, terms, prefix, candidates):
+    match = ' AND '.join(f'"{term}"' for term in terms) + ('*' if prefix else '')
+    return [row[0] for row in db.session.execute(
+        text(f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :match ORDER BY rowid DESC LIMIT :candidates"),
+        {'match': match, 'candidates': candidates})]
+
+def rank_candidates(spec, terms, ids):
+    """Order candidate ids by the weight of the columns each term matched in, newest first on ties
+
+    Used instead of FTS5's bm25(), whose per-query document frequencies read the full posting
+    list of every term; with all terms required, they barely change the order anyway.
+    """
+    model = spec['model']
+    weights = {column: SEARCH_WEIGHTS[weight] for weight, columns in spec['columns'].items() for column in columns}
+    rows = db.session.execute(db.select(model.id, *[getattr(model, column) for column in weights])
+                              .where(model.id.in_(ids))) if ids else []
+    scores = {}
+    for row in rows:
+        tokens = {column: set(search_terms(value or '', minimum=1)) for column, value in zip(weights, row[1:])}
+        score = 0.0
+        for position, term in enumerate(terms):
+            last = position == len(terms) - 1
+            score += max([weights[column] if term in words else weights[column] / 2
+                          for column, words in tokens.items()
+                          if term in words or (last and any(word.startswith(term) for word in words))] or [0])
+        scores[row.id] = score
+    return sorted(scores, key=lambda id_: (-scores[id_], -id_))
+
+def search_ids(name, terms, limit, offset):
+    """Ids of matching rows, best match first
+
+    Every term must match as a whole word except the last, which matches as a prefix so
+    results follow the admin's typing. Only the newest SEARCH_CANDIDATES matches are ranked:
+    a term shared by most rows would otherwise score the whole table on every keystroke.
+    """
+    spec = SEARCH_TABLES[name]
+    table = spec['model'].__tablename__
+    candidates = max(app.config['SEARCH_CANDIDATES'], offset + limit)
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Rank in the outer query so ts_rank only runs over the candidates
+        sql = (f"SELECT id FROM (SELECT id, search_vector FROM {table} "
+               f"WHERE search_vector @@ to_tsquery('simple', :query) ORDER BY id DESC LIMIT :candidates) hits "
+               f"ORDER BY ts_rank(search_vector, to_tsquery('simple', :query)) DESC, id DESC "
+               f"LIMIT :limit OFFSET :offset")
+        params = {'query': ' & '.join(terms[:-1] + [f'{terms[-1]}:*']), 'candidates': candidates,
+                  'limit': limit, 'offset': offset}
+        return [row[0] for row in db.session.execute(text(sql), params)]
+    if dialect == 'sqlite':
+        # A prefix query merges the posting lists of every word it expands to before returning
+        # anything, so it only runs when whole-word matches do not fill the candidates
+        ids = _fts_candidates(table, terms, False, candidates)
+        if len(ids) < candidates:
+            ids = _fts_candidates(table, terms, True, candidates)
+        return rank_candidates(spec, terms, ids)[offset:offset + limit]
+    # No full-text index on other databases: unranked substring match, newest first
+    model = spec['model']
+    conditions = [db.or_(*[getattr(model, column).ilike(f'%{term}%') for column in _search_columns(spec)])
+                  for term in terms]
+    return list(db.session.execute(db.select(model.id).where(*conditions).order_by(model.id.desc())
+                                   .limit(limit).offset(offset)).scalars())
+
+def _search_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and len(value) > SEARCH_SNIPPET_LENGTH:
+        return value[:SEARCH_SNIPPET_LENGTH] + '…'
+    return value
+
+def search_table(name, terms, page, per_page):
+    """One page of ranked hits from a table, fetching one extra id to tell whether more exist"""
+    spec = SEARCH_TABLES[name]
+    model = spec['model']
+    ids = search_ids(name, terms, per_page + 1, (page - 1) * per_page)
+    has_more = len(ids) > per_page
+    ids = ids[:per_page]
+    columns = [getattr(model, field) for field in spec['fields']]
+    rows = {row.id: row for row in db.session.execute(db.select(*columns).where(model.id.in_(ids)))} if ids else {}
+    return {
+        'items': [{field: _search_value(getattr(rows[id_], field)) for field in spec['fields']}
+                  for id_ in ids if id_ in rows],
+        'has_more': has_more,
+    }
+
+@app.route('/admin/search')
+@admin_required
+def admin_search():
+    """Ranked search over orders, contact messages and reviews: ?q=...&type=all|orders|messages|reviews&page="""
+    query = request.args.get('q', '')
+    terms = search_terms(query)[:8]
+    if not terms:
+        return jsonify({'error': 'Enter at least one word or number of two or more characters'}), 400
+    
+    scope = request.args.get('type', 'all')
+    if scope != 'all' and scope not in SEARCH_TABLES:
+        return jsonify({'error': f"type must be all or one of: {', '.join(SEARCH_TABLES)}"}), 400
+    page = min(max(request.args.get('page', 1, type=int), 1), app.config['SEARCH_MAX_PAGE'])
+    per_page = min(max(request.args.get('per_page', app.config['SEARCH_PAGE_SIZE'], type=int), 1),
+                   app.config['SEARCH_MAX_PAGE_SIZE'])
+    
+    try:
+        names = list(SEARCH_TABLES) if scope == 'all' else [scope]
+        results = {name: search_table(name, terms, page, per_page) for name in names}
+    except Exception as e:
+        app.logger.error(f"Search error: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Search failed'}), 500
+    return jsonify({'query': query, 'terms': terms, 'page': page, 'per_page': per_page, 'results': results})
+
+@app.route('/admin/export/<dataset>')
+@admin_required
+def admin_export(dataset):
+    """Stream orders, messages or subscribers as CSV or JSONL"""
+    fmt = request.args.get('format', 'csv')
+    if dataset not in EXPORTS or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unknown export'}), 404
+    
+    try:
+        start = parse_export_date(request.args.get('start'))
+        end = parse_export_date(request.args.get('end'), end=True)
+        query = build_export_query(dataset, start, end, request.args.get('status') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    columns = EXPORTS[dataset][3]
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    response = app.response_class(stream_with_context(iter_export(query, columns, fmt)),
+                                  mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/admin/upload_logo', methods=['POST'])
 @admin_required
 def upload_logo():
@@ -766,35 +3473,33 @@ def upload_logo():
             return redirect(url_for('admin_dashboard'))
         
         if file:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'logos', filename)
-            file.save(filepath)
-            
-            # Generate file hash
-            with open(filepath, 'rb') as f:
-                file_hash = hashlib.sha256(f.read()).hexdigest()
+            upload = spool_upload(file)
+            file_hash = upload.hexdigest()
             
-            # Get file size
-            file_size = os.path.getsize(filepath)
+            # Content-addressed dedup: the same image is stored and processed once
+            existing = Logo.query.filter_by(file_hash=file_hash).first()
+            if existing:
+                upload.close()
+                flash(f'This logo is already in the portfolio ({existing.filename})', 'info')
+                return redirect(url_for('admin_dashboard'))
             
-            # Optimize image if it's an image file
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                try:
-                    img = Image.open(filepath)
-                    img.save(filepath, optimize=True, quality=85)
-                except Exception as e:
-                    app.logger.warning(f"Could not optimize image: {e}")
+            filename = upload_filename(file)
+            with upload_duration.labels('logos', 'store').time():
+                storage.save_upload(upload, f"logos/{filename}")
+            upload_bytes.labels('logos').inc(upload.size)
             
             logo = Logo(
                 filename=filename, 
                 client_name=client_name,
-                file_size=file_size,
+                file_size=upload.size,
                 file_hash=file_hash
             )
             db.session.add(logo)
             db.session.commit()
+            gallery_cache.invalidate()
+            
+            # Resized copies are generated in the background
+            schedule_image_variants(Logo, logo.id, filename, 'logos')
             
             flash('Logo uploaded successfully!', 'success')
             return redirect(url_for('admin_dashboard'))
@@ -823,27 +3528,20 @@ def upload_company_logo():
             # Deactivate old logos
             CompanyLogo.query.update({CompanyLogo.is_active: False})
             
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"company_{timestamp}_{filename}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'company', filename)
-            file.save(filepath)
-            
-            # Get file size
-            file_size = os.path.getsize(filepath)
-            
-            # Optimize image
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                try:
-                    img = Image.open(filepath)
-                    img.save(filepath, optimize=True, quality=85)
-                except Exception as e:
-                    app.logger.warning(f"Could not optimize company logo: {e}")
+            upload = spool_upload(file)
+            filename = upload_filename(file, prefix='company_')
+            with upload_duration.labels('company', 'store').time():
+                storage.save_upload(upload, f"company/{filename}")
+            upload_bytes.labels('company').inc(upload.size)
             
-            company_logo = CompanyLogo(filename=filename, is_active=True, file_size=file_size)
+            company_logo = CompanyLogo(filename=filename, is_active=True, file_size=upload.size)
             db.session.add(company_logo)
             db.session.commit()
+            company_logo_cache.invalidate()
             
+            # Resized copies are generated in the background
+            schedule_image_variants(CompanyLogo, company_logo.id, filename, 'company')
+
             flash('Company logo updated successfully!', 'success')
             return redirect(url_for('admin_dashboard'))
     except Exception as e:
@@ -859,12 +3557,12 @@ def delete_logo(logo_id):
         logo = Logo.query.get_or_404(logo_id)
         
         # Delete file
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'logos', logo.filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        storage.delete(f"logos/{logo.filename}")
+        delete_image_variants(logo.variants, 'logos')
         
         db.session.delete(logo)
         db.session.commit()
+        gallery_cache.invalidate()
         
         flash('Logo deleted successfully!', 'success')
         return redirect(url_for('admin_dashboard'))
@@ -874,22 +3572,43 @@ def delete_logo(logo_id):
         flash(f'Error deleting logo: {str(e)}', 'error')
         return redirect(url_for('admin_dashboard'))
 
+# Order status changes allowed from each status; the single and bulk updates both enforce them
+ORDER_STATUSES = ('pending', 'in-progress', 'completed', 'cancelled')
+ORDER_STATUS_TRANSITIONS = {
+    'pending': {'in-progress', 'completed', 'cancelled'},
+    'in-progress': {'pending', 'completed', 'cancelled'},
+    'completed': {'in-progress'},  # reopen for rework
+    'cancelled': {'pending'},  # restore
+}
+
 @app.route('/admin/update_order_status/<int:order_id>', methods=['POST'])
 @admin_required
 def update_order_status(order_id):
     try:
-        order = Order.query.get_or_404(order_id)
+        # Lock the row so concurrent updates cannot both apply a delta from the same old status
+        order = db.session.execute(db.select(Order).where(Order.id == order_id).with_for_update()).scalar_one_or_none()
+        if order is None:
+            abort(404)
         new_status = request.form.get('status')
         
-        if new_status in ['pending', 'in-progress', 'completed', 'cancelled']:
+        if new_status in ORDER_STATUSES and new_status != order.status \
+                and new_status not in ORDER_STATUS_TRANSITIONS.get(order.status, ()):
+            flash(f'Cannot move an order from {order.status} to {new_status}', 'error')
+        elif new_status in ORDER_STATUSES:
             old_status = order.status
+            before = rollup_fields(order)
             order.status = new_status
             
             # Set completion date if completed
             if new_status == 'completed':
                 order.completed_date = datetime.utcnow()
             
+            record_order_change(before, rollup_fields(order))
+            publish_event('order_status', order_id=order.id, tracking_number=order.tracking_number,
+                          status=new_status, previous_status=old_status)
             db.session.commit()
+            bump_cache_version('orders')
+            tracking_cache.invalidate()
             flash(f'Order status updated from {old_status} to {new_status}!', 'success')
         else:
             flash('Invalid status', 'error')
@@ -901,12 +3620,228 @@ def update_order_status(order_id):
         flash(f'Error updating order status: {str(e)}', 'error')
         return redirect(url_for('admin_dashboard'))
 
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def apply_status_updates(updates):
+    """Validate (order_id, status) pairs and apply them in batched UPDATEs; the caller commits.
+    
+    Returns one result per pair, in order.
+    """
+    results = []
+    now = datetime.utcnow()
+    rollup_deltas = {}
+    for batch in chunked(updates, app.config['BULK_BATCH_SIZE']):
+        ids = {order_id for order_id, _ in batch if type(order_id) is int}
+        rows = db.session.execute(db.select(Order.id, Order.tracking_number,
+                                            *(getattr(Order, field) for field in ROLLUP_ORDER_FIELDS))
+                                  .where(Order.id.in_(ids)).order_by(Order.id)
+                                  .with_for_update()).all() if ids else []
+        statuses = {row.id: row.status for row in rows}
+        tracking_numbers = {row.id: row.tracking_number for row in rows}
+        rollups = {row.id: rollup_fields(row) for row in rows}
+        original = dict(statuses)
+        
+        for order_id, status in batch:
+            result = {'order_id': order_id, 'status': status}
+            current = statuses.get(order_id) if type(order_id) is int else None
+            if type(order_id) is not int:
+                result['result'] = 'invalid_order_id'
+            elif status not in ORDER_STATUSES:
+                result['result'] = 'invalid_status'
+            elif current is None:
+                result['result'] = 'not_found'
+            elif current == status:
+                result['result'] = 'unchanged'
+            elif status not in ORDER_STATUS_TRANSITIONS[current]:
+                result.update(result='invalid_transition', previous_status=current)
+            else:
+                result.update(result='updated', previous_status=current)
+                statuses[order_id] = status  # later rows for the same order start from here
+            results.append(result)
+        
+        # One UPDATE per target status, covering every order whose final status changed
+        targets = {}
+        for order_id, status in statuses.items():
+            if status != original[order_id]:
+                targets.setdefault(status, []).append(order_id)
+        for status, order_ids in targets.items():
+            values = {'status': status}
+            if status == 'completed':
+                values['completed_date'] = now
+            db.session.execute(update(Order).where(Order.id.in_(order_ids)).values(**values),
+                               execution_options={'synchronize_session': False})
+            for order_id in order_ids:
+                add_rollup_change(rollup_deltas, rollups[order_id], dict(rollups[order_id], **values))
+                publish_event('order_status', order_id=order_id, tracking_number=tracking_numbers[order_id],
+                              status=status, previous_status=original[order_id])
+    apply_rollup_deltas(rollup_deltas)
+    return results
+
+@app.route('/admin/orders/bulk-status', methods=['POST'])
+@admin_required
+def bulk_update_order_status():
+    """Apply many status changes in one transaction.
+    
+    JSON body: {"updates": [{"order_id": 1, "status": "completed"}, ...]} and/or
+    {"order_ids": [1, 2, ...], "status": "completed"}; send the CSRF token as X-CSRF-Token.
+    """
+    if not csrf_token_valid():
+        return jsonify({'error': 'Security validation failed'}), 400
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    
+    items = payload.get('updates') or []
+    order_ids = payload.get('order_ids') or []
+    if not isinstance(items, list) or not isinstance(order_ids, list):
+        return jsonify({'error': 'updates and order_ids must be lists'}), 400
+    
+    updates = [(item.get('order_id'), item.get('status')) if isinstance(item, dict) else (None, None)
+               for item in items]
+    updates += [(order_id, payload.get('status')) for order_id in order_ids]
+    if not updates:
+        return jsonify({'error': 'No updates given'}), 400
+    if len(updates) > app.config['BULK_MAX_ROWS']:
+        return jsonify({'error': f"At most {app.config['BULK_MAX_ROWS']} updates per request"}), 413
+    
+    try:
+        results = apply_status_updates(updates)
+        db.session.commit()
+    except Exception as e:
+        app.logger.error(f"Bulk status update error: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Bulk update failed; no orders were changed'}), 500
+    
+    updated = sum(result['result'] == 'updated' for result in results)
+    if updated:
+        bump_cache_version('orders')
+        tracking_cache.invalidate()
+    return jsonify({
+        'updated': updated,
+        'unchanged': sum(result['result'] == 'unchanged' for result in results),
+        'failed': sum(result['result'] not in ('updated', 'unchanged') for result in results),
+        'results': results,
+    })
+
+ORDER_IMPORT_COLUMNS = ('service_id', 'customer_name', 'customer_email', 'customer_phone', 'details')
+
+def validate_import_row(row):
+    """Return (order values, None) for a valid CSV row, or (None, error message)"""
+    values = {column: sanitize_input(row.get(column) or '') for column in ORDER_IMPORT_COLUMNS}
+    service = SERVICE_CATALOG.get(values['service_id'])
+    if not service:
+        return None, 'Unknown service_id'
+    if len(values['customer_name']) < 2:
+        return None, 'Invalid customer_name'
+    if not validate_email(values['customer_email']):
+        return None, 'Invalid customer_email'
+    if not validate_phone(values['customer_phone']):
+        return None, 'Invalid customer_phone'
+    values.update(service=service['name'], amount=service['price'])
+    return values, None
+
+def unique_tracking_numbers(count):
+    """Tracking numbers not used by any existing order or by each other"""
+    numbers = set()
+    while len(numbers) < count:
+        candidates = list({generate_tracking_number() for _ in range(count - len(numbers))} - numbers)
+        for batch in chunked(candidates, app.config['BULK_BATCH_SIZE']):
+            taken = set(db.session.execute(db.select(Order.tracking_number)
+                                           .where(Order.tracking_number.in_(batch))).scalars())
+            numbers.update(number for number in batch if number not in taken)
+    return list(numbers)
+
+@app.route('/admin/orders/import', methods=['POST'])
+@admin_required
+def import_orders():
+    """Create orders from a CSV (orders_file upload, or a text/csv body) in one transaction.
+    
+    Columns: service_id, customer_name, customer_email, customer_phone and optional details.
+    Valid rows are inserted, invalid ones reported; ?dry_run=1 only validates.
+    """
+    if not csrf_token_valid():
+        return jsonify({'error': 'Security validation failed'}), 400
+    upload = request.files.get('orders_file')
+    try:
+        text_data = upload.read().decode('utf-8-sig') if upload else request.get_data().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return jsonify({'error': 'CSV must be UTF-8'}), 400
+    
+    reader = csv.DictReader(io.StringIO(text_data))
+    missing = [column for column in ORDER_IMPORT_COLUMNS[:4] if column not in (reader.fieldnames or ())]
+    if missing:
+        return jsonify({'error': f"Missing columns: {', '.join(missing)}"}), 400
+    
+    results, orders = [], []
+    for line, row in enumerate(reader, start=2):  # line 1 is the header
+        if len(results) >= app.config['BULK_MAX_ROWS']:
+            return jsonify({'error': f"At most {app.config['BULK_MAX_ROWS']} rows per import"}), 413
+        values, error = validate_import_row(row)
+        if error:
+            results.append({'line': line, 'result': 'invalid', 'error': error})
+        else:
+            results.append({'line': line, 'result': 'valid'})
+            orders.append((results[-1], values))
+    
+    dry_run = request.args.get('dry_run') == '1'
+    if orders and not dry_run:
+        try:
+            now = datetime.utcnow()
+            rollup_deltas = {}
+            for (result, values), tracking_number in zip(orders, unique_tracking_numbers(len(orders))):
+                values.update(tracking_number=tracking_number, order_date=now, status='pending')
+                result.update(result='created', tracking_number=tracking_number)
+                add_rollup_change(rollup_deltas, after=dict(values, completed_date=None))
+            for batch in chunked([values for _, values in orders], app.config['BULK_BATCH_SIZE']):
+                db.session.execute(insert(Order), batch)
+            apply_rollup_deltas(rollup_deltas)
+            publish_event('orders_imported', count=len(orders))
+            db.session.commit()
+        except Exception as e:
+            app.logger.error(f"Order import error: {e}")
+            db.session.rollback()
+            return jsonify({'error': 'Import failed; no orders were created'}), 500
+        bump_cache_version('orders')
+        for _, values in orders:
+            orders_created.labels(values['service_id']).inc()
+    
+    return jsonify({
+        'created': 0 if dry_run else len(orders),
+        'valid': len(orders),
+        'failed': len(results) - len(orders),
+        'dry_run': dry_run,
+        'results': results,
+    })
+
 @app.route('/admin/logout')
 def admin_logout():
     session.clear()
     flash('You have been logged out successfully', 'success')
     return redirect(url_for('index'))
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint, aggregated across gunicorn workers"""
+    token = app.config['METRICS_TOKEN']
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    sample_pool_metrics()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    try:
+        body = generate_latest(registry) + generate_latest(outbox_registry)
+    except Exception as e:
+        app.logger.error(f"Metrics collection failed: {e}")
+        db.session.rollback()
+        body = generate_latest(registry)
+    return body, 200, {'Content-Type': CONTENT_TYPE_LATEST, 'Cache-Control': 'no-store'}
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -929,16 +3864,82 @@ def health():
 # Error Handlers
 @app.errorhandler(404)
 def not_found_error(error):
-    company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-    return render_template('404.html', company_logo=company_logo), 404
+    return render_template('404.html'), 404
 
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    company_logo = CompanyLogo.query.filter_by(is_active=True).first()
-    return render_template('500.html', company_logo=company_logo), 500
+    return render_template('500.html'), 500
+
+
+
+# Schema migrations - applied in order, each exactly once per database
+def _create_indexes(*models):
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def _add_columns(model, *names):
+    from sqlalchemy import inspect
+    table = model.__table__
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for name in names:
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=db.engine.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+
+def migration_001_hot_path_indexes():
+    _create_indexes(Order, Review, Logo, ContactMessage, CompanyLogo)
+
+def migration_002_image_variants():
+    _add_columns(Logo, 'variants')
+    _add_columns(CompanyLogo, 'variants')
+
+def migration_003_notification_outbox():
+    NotificationOutbox.__table__.create(bind=db.engine, checkfirst=True)
+
+def migration_004_logo_file_hash_index():
+    _create_indexes(Logo)
+
+def migration_005_search_indexes():
+    create_search_indexes()
+
+def migration_006_order_rollups():
+    OrderRollup.__table__.create(bind=db.engine, checkfirst=True)
+    rebuild_order_rollups()
 
+def migration_007_newsletter_campaigns():
+    NewsletterCampaign.__table__.create(bind=db.engine, checkfirst=True)
+    NewsletterDelivery.__table__.create(bind=db.engine, checkfirst=True)
+    # Every recipient needs an unsubscribe link
+    for subscriber in Newsletter.query.filter(Newsletter.unsubscribe_token.is_(None)):
+        subscriber.unsubscribe_token = secrets.token_urlsafe(32)
 
+MIGRATIONS = [
+    (1, 'Add indexes for hot lookup columns', migration_001_hot_path_indexes),
+    (2, 'Add responsive image variants', migration_002_image_variants),
+    (3, 'Add notification outbox', migration_003_notification_outbox),
+    (4, 'Index logo file hashes for upload dedup', migration_004_logo_file_hash_index),
+    (5, 'Add full-text search indexes', migration_005_search_indexes),
+    (6, 'Add order analytics rollups', migration_006_order_rollups),
+    (7, 'Add newsletter campaigns', migration_007_newsletter_campaigns),
+]
+
+def run_migrations():
+    """Apply pending schema migrations and record them in schema_migrations"""
+    SchemaMigration.__table__.create(bind=db.engine, checkfirst=True)
+    applied = {row.version for row in SchemaMigration.query.all()}
+    
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"Applying migration {version:03d}: {name}...")
+        migrate()
+        db.session.add(SchemaMigration(version=version, name=name))
+        db.session.commit()
+        print(f"✓ Migration {version:03d} applied")
 
 # Initialize database
 def init_db():
@@ -958,6 +3959,8 @@ def init_db():
             else:
                 print("✓ Database tables already exist")
             
+            run_migrations()
+            
             # Create default admin if not exists
             try:
                 admin = Admin.query.filter_by(username='Ntando').first()
@@ -984,56 +3987,53 @@ def init_db():
             # Don't rollback on initialization errors
             return False
 
-# Initialize database on startup for deployment platforms
-def initialize_on_startup():
-    """Initialize database when app starts"""
+def ensure_directories():
+    """Create upload, log and cache directories"""
     try:
-        with app.app_context():
-            # Test if admin table exists
-            from sqlalchemy import inspect
-            inspector = inspect(db.engine)
-            existing_tables = inspector.get_table_names()
-            
-            if not existing_tables or 'admin' not in existing_tables:
-                print("Initializing database on startup...")
-                init_db()
-            else:
-                print("✓ Database tables already exist")
-                
-                # Check if admin exists
-                admin = Admin.query.filter_by(username='Ntando').first()
-                if not admin:
-                    print("Creating default admin user...")
-                    hashed_password = generate_password_hash('Ntando')
-                    admin = Admin(
-                        username='Ntando',
-                        password=hashed_password,
-                        email='admin@ntandostore.com'
-                    )
-                    db.session.add(admin)
-                    db.session.commit()
-                    print("✓ Default admin created: username=Ntando, password=Ntando")
-                    
+        os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'logos'), exist_ok=True)
+        os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'company'), exist_ok=True)
+        os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+        os.makedirs('logs', exist_ok=True)
+        os.makedirs(app.config['CACHE_DIR'], exist_ok=True)
     except Exception as e:
-        print(f"Database initialization error: {e}")
+        app.logger.error(f"Warning: Could not create upload directories: {e}")
 
-# Auto-initialize database on first request (fallback)
-@app.before_request
-def initialize_database():
-    """Initialize database on first request if not already done"""
-    if not hasattr(app, 'db_initialized'):
-        initialize_on_startup()
-        app.db_initialized = True
+def sweep_upload_tmp():
+    """Remove .part files left in UPLOAD_TMP_FOLDER by workers killed mid-upload"""
+    cutoff = time.time() - app.config['UPLOAD_TMP_MAX_AGE']
+    removed = 0
+    try:
+        with os.scandir(app.config['UPLOAD_TMP_FOLDER']) as entries:
+            for entry in entries:
+                if entry.name.endswith('.part') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+    except OSError as e:
+        app.logger.error(f"Could not sweep upload temp files: {e}")
+    return removed
+
+# One-shot bootstrap, run once per deploy (gunicorn on_starting or the CLI) - never per request
+def bootstrap():
+    """Create directories, schema, migrations and the default admin"""
+    ensure_directories()
+    sweep_upload_tmp()
+    return init_db()
+
+def initialize_on_startup():
+    """Initialize database when app starts"""
+    return bootstrap()
+
+@app.cli.command('bootstrap')
+def bootstrap_command():
+    """Prepare directories and the database for this deploy"""
+    if not bootstrap():
+        raise SystemExit(1)
 
 if __name__ == '__main__':
-    init_db()
+    bootstrap()
+    notification_dispatcher.ensure_started()
     port = int(os.environ.get('PORT', 5000))
     
-    # Create directories if they don't exist
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'logos'), exist_ok=True)
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'company'), exist_ok=True)
-    os.makedirs('logs', exist_ok=True)
-    
     # Run in production mode for deployment platforms
     debug_mode = os.environ.get('FLASK_ENV', 'production') != 'production'
     app.run(debug=debug_mode, host='0.0.0.0', port=port, threaded=True)
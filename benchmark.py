@@ -0,0 +1,1016 @@
+#!/usr/bin/env python3
+"""
+Query-count benchmark for NtandoStore public pages
+
+Runs against a throwaway SQLite database so it never touches production data
+(set DATABASE_URL to a scratch Postgres database to benchmark Postgres).
+Pass --suite for the HTTP load-test and regression suite, --explain to check that every hot query is served by an index,
+--cold-start to time worker boot and the first request, --catalog to
+compare per-request service grouping with the precomputed catalog,
+--uploads to compare the streaming upload path with save-then-rehash,
+--login-flood to measure public page latency during a login flood,
+--serving to compare gunicorn serving modes (sync, gthread, gevent),
+--search to time admin search at --orders rows (e.g. --search --orders 1000000),
+--newsletter to send a campaign to a local aiosmtpd sink (pip install aiosmtpd),
+--notifications to drain the notification outbox into a stub HTTP provider, or
+--storage to round-trip uploads through S3Storage against moto's S3 server (pip install moto[server]).
+"""
+import argparse
+import hashlib
+import http.cookiejar
+import http.server
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+DB_DIR = tempfile.mkdtemp(prefix='ntandostore_bench_')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}")
+os.environ.setdefault('CACHE_DIR', os.path.join(DB_DIR, 'cache'))
+os.environ.setdefault('UPLOAD_TMP_FOLDER', os.path.join(DB_DIR, 'uploads_tmp'))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')  # shared by all gunicorn workers
+
+from sqlalchemy import event
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from werkzeug.security import generate_password_hash
+
+from app import (app, create_storage, db, notification_dispatcher, queue_notification, rebuild_order_rollups,
+                 run_migrations, start_campaign, Admin, CampaignSender, CompanyLogo, ContactMessage,
+                 HashingUploadFile, Logo, Newsletter, NewsletterCampaign, NotificationOutbox, Order, Review,
+                 SERVICES, SERVICE_CATALOG, UploadRequest, spool_upload)
+
+ROUTES = ['/services', '/gallery', '/order/website_design', '/track/NTD-00000000-000000']
+REQUESTS_PER_ROUTE = 50
+
+
+class QueryCounter:
+    """Counts statements executed on the app engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+# Query shapes used by the public pages and the admin dashboard
+HOT_QUERIES = {
+    'index reviews': lambda: Review.query.filter_by(is_approved=True).order_by(Review.created_at.desc()).limit(6),
+    'index recent orders': lambda: Order.query.filter_by(status='completed').order_by(Order.completed_date.desc()).limit(10),
+    'orders by status': lambda: Order.query.filter_by(status='pending'),
+    'dashboard orders': lambda: Order.query.order_by(Order.order_date.desc()).limit(20),
+    'gallery logos': lambda: Logo.query.order_by(Logo.upload_date.desc(), Logo.id.desc()).limit(24),
+    'dashboard messages': lambda: ContactMessage.query.order_by(ContactMessage.created_at.desc()).limit(10),
+    'new messages': lambda: ContactMessage.query.filter_by(status='new'),
+    'active company logo': lambda: CompanyLogo.query.filter_by(is_active=True).limit(1),
+}
+
+
+def explain(query):
+    """Return the database query plan for a query as a single string"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    if db.engine.dialect.name == 'sqlite':
+        rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return ' | '.join(row[-1] for row in rows)
+    # Tiny tables always favour sequential scans on Postgres; ask for the index plan
+    db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    rows = db.session.execute(db.text(f"EXPLAIN {sql}")).fetchall()
+    return ' | '.join(row[0] for row in rows)
+
+
+def uses_index(plan):
+    if 'Seq Scan' in plan:
+        return False
+    if 'SCAN' in plan and 'INDEX' not in plan:
+        return False
+    return 'INDEX' in plan.upper()
+
+
+def check_indexes():
+    """Fail if any hot query falls back to a full table scan"""
+    print("\n🔍 Query plans")
+    failures = 0
+    with app.app_context():
+        for name, build in HOT_QUERIES.items():
+            plan = explain(build())
+            ok = uses_index(plan)
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} {name:<22} {plan}")
+        db.session.rollback()
+    return 1 if failures else 0
+
+
+# Runs in a fresh interpreter, like a newly forked gunicorn worker
+COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+import app
+imported = time.perf_counter()
+queries = []
+with app.app.app_context():
+    event.listen(app.db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+client = app.app.test_client()
+client.get('/services')
+first = time.perf_counter()
+client.get('/services')
+second = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first - imported) * 1000,
+    'second_request_ms': (second - first) * 1000,
+    'first_request_queries': len(queries)
+}))
+"""
+
+
+def cold_start(runs=5):
+    """Time module import and the first request in fresh worker processes"""
+    print(f"\n⏱️  Cold start ({runs} fresh processes)")
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    for key in ('import_ms', 'first_request_ms', 'second_request_ms', 'first_request_queries'):
+        values = [sample[key] for sample in samples]
+        print(f"   {key:<24} median {statistics.median(values):8.2f}   max {max(values):8.2f}")
+    return 0
+
+
+def regroup_services(category):
+    """What the services route used to do on every request"""
+    if category == 'all':
+        filtered = SERVICES
+    else:
+        filtered = {k: v for k, v in SERVICES.items() if v['category'] == category}
+    categories = {}
+    for service_id, service in SERVICES.items():
+        categories.setdefault(service['category'], []).append((service_id, service))
+    return filtered, categories, json.dumps(filtered)
+
+
+def catalog_services(category):
+    return (SERVICE_CATALOG.in_category(category), SERVICE_CATALOG.categories,
+            SERVICE_CATALOG.script_json(category))
+
+
+def catalog_benchmark(number=20000):
+    """Time per-request grouping against the frozen catalog views"""
+    print(f"\n📦 Service catalog ({number} lookups per category)")
+    for category in ('all', 'design', 'hosting'):
+        legacy = timeit.timeit(lambda: regroup_services(category), number=number)
+        catalog = timeit.timeit(lambda: catalog_services(category), number=number)
+        print(f"   {category:<10} regroup {legacy / number * 1e6:7.2f} µs   catalog {catalog / number * 1e6:7.2f} µs"
+              f"   {legacy / catalog:6.1f}x")
+    return 0
+
+
+def legacy_upload(environ, dest):
+    """The old path: werkzeug spools the body, save() copies it, then it is re-read for the hash"""
+    file = Request(environ).files['logo_file']
+    file.save(dest)
+    with open(dest, 'rb') as f:
+        file_hash = hashlib.sha256(f.read()).hexdigest()
+    return file_hash, os.path.getsize(dest)
+
+
+def streaming_upload(environ, dest):
+    request = UploadRequest(environ)
+    upload = spool_upload(request.files['logo_file'])
+    upload.commit(dest)
+    request.close()
+    return upload.hexdigest(), upload.size
+
+
+def upload_benchmark(sizes_mb=(1, 8, 15), runs=5):
+    """Time and peak Python memory for parsing and storing large uploads"""
+    print(f"\n📤 Uploads ({runs} runs per size)")
+    dest = os.path.join(DB_DIR, 'upload.bin')
+    with app.app_context():
+        for size in sizes_mb:
+            payload = os.urandom(size * 1024 * 1024)
+            raw = EnvironBuilder(method='POST', data={'logo_file': (io.BytesIO(payload), 'big.png')}).get_environ()
+            data = raw['wsgi.input'].read()
+            results = {}
+            for label, handler in (('save+rehash', legacy_upload), ('streaming', streaming_upload)):
+                timings = []
+                tracemalloc.start()
+                for _ in range(runs):
+                    environ = dict(raw, **{'wsgi.input': io.BytesIO(data)})
+                    started = time.perf_counter()
+                    digest, written = handler(environ, dest)
+                    timings.append(time.perf_counter() - started)
+                    assert written == len(payload) and digest == hashlib.sha256(payload).hexdigest()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results[label] = (statistics.median(timings), peak)
+            for label, (elapsed, peak) in results.items():
+                print(f"   {size:>3} MB  {label:<12} {elapsed * 1000:8.2f} ms   peak {peak / 1024 / 1024:6.2f} MB")
+    return 0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def sample_latency(base_url, path, count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        urllib.request.urlopen(base_url + path, timeout=30).read()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+UNPROTECTED_LOGIN = {'LOGIN_RATE_LIMIT_IP': '0', 'LOGIN_RATE_LIMIT_USER': '0', 'LOGIN_HASH_RATE_LIMIT': '0',
+                     'LOGIN_HASH_WORKERS': '16', 'LOGIN_HASH_MAX_PENDING': '1000'}
+
+
+def start_gunicorn(port, extra_env):
+    """Run the app under gunicorn sync workers, like production"""
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY='2', BOOTSTRAP_ON_START='false')
+    env.update(extra_env)
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py',
+                                '--bind', f'127.0.0.1:{port}', '--access-logfile', '/dev/null',
+                                # No worker recycling mid-run: measure steady state, not app import time
+                                '--max-requests', '0'],
+                               env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + '/services', timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def login_flood(attackers=8, duration=10, probes=50):
+    """Hammer /admin/login from many addresses while timing a public page, with and without protection"""
+    print(f"\n🔐 Login flood ({attackers} attackers for {duration}s, 2 sync workers, {probes} probes of /services)")
+    with app.app_context():
+        if not Admin.query.filter_by(username='Ntando').first():
+            db.session.add(Admin(username='Ntando', password=generate_password_hash('correct horse')))
+            db.session.commit()
+    
+    names = {200: 'checked', 429: 'rate limited', 503: 'hash budget spent'}
+    for label, extra_env in (('protected', {}), ('unprotected', UNPROTECTED_LOGIN)):
+        # Attackers vary X-Forwarded-For, so run as if behind one proxy
+        server, base_url = start_gunicorn(8750, dict(extra_env, TRUSTED_PROXY_COUNT='1'))
+        try:
+            sample_latency(base_url, '/services', 10)  # warm up
+            baseline = sample_latency(base_url, '/services', probes)
+            
+            # Attackers run in their own processes so they do not share a GIL with anything
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            results = context.Queue()
+            processes = [context.Process(target=attack, args=(base_url, worker, stop, results), daemon=True)
+                         for worker in range(attackers)]
+            for process in processes:
+                process.start()
+            time.sleep(1)
+            started = time.perf_counter()
+            flooded = sample_latency(base_url, '/services', probes)
+            time.sleep(max(0, duration - 1 - (time.perf_counter() - started)))
+            stop.set()
+            outcomes = {}
+            for _ in processes:
+                for status, count in results.get().items():
+                    outcomes[status] = outcomes.get(status, 0) + count
+            for process in processes:
+                process.join()
+        finally:
+            server.terminate()
+            server.wait()
+        
+        print(f"   {label}")
+        for phase, timings in (('idle', baseline), ('during flood', flooded)):
+            print(f"     /services {phase:<13} p50 {percentile(timings, 50):8.2f} ms"
+                  f"   p95 {percentile(timings, 95):8.2f} ms   max {max(timings):8.2f} ms")
+        print("     login responses: " + ', '.join(f"{names.get(status, status)} {count}"
+                                                  for status, count in sorted(outcomes.items())))
+    return 0
+
+
+SERVING_PATHS = ['/services', '/api/services', '/gallery', '/api/gallery', '/order/website_design']
+
+
+def load_client(base_url, paths, threads, deadline, results):
+    """Request paths round-robin from several threads until the deadline"""
+    timings, errors = [], {}
+    
+    def run(offset):
+        index = offset
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(base_url + paths[index % len(paths)], timeout=30).read()
+                timings.append((time.perf_counter() - started) * 1000)
+            except OSError as e:
+                name = type(e).__name__
+                errors[name] = errors.get(name, 0) + 1
+            index += 1
+    
+    workers = [threading.Thread(target=run, args=(offset,)) for offset in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((timings, errors))
+
+
+def drive_load(base_url, paths, clients, duration, processes=4):
+    """Run clients spread over a few processes; return (latencies in ms, errors by type, elapsed seconds)"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    deadline = time.time() + duration
+    processes = min(processes, clients)
+    spawned = [context.Process(target=load_client,
+                               args=(base_url, paths, clients // processes + (i < clients % processes),
+                                     deadline, results))
+               for i in range(processes)]
+    started = time.perf_counter()
+    for process in spawned:
+        process.start()
+    timings, errors = [], {}
+    for _ in spawned:
+        client_timings, client_errors = results.get()
+        timings.extend(client_timings)
+        for name, count in client_errors.items():
+            errors[name] = errors.get(name, 0) + count
+    for process in spawned:
+        process.join()
+    return timings, errors, time.perf_counter() - started
+
+
+def serving_modes(clients=32, duration=15):
+    """Compare requests/sec and latency percentiles across gunicorn serving modes"""
+    print(f"\n🚦 Serving modes ({clients} concurrent clients for {duration}s, WEB_CONCURRENCY=2)")
+    modes = ['sync', 'gthread']
+    try:
+        import gevent  # noqa: F401
+        modes.append('gevent')
+    except ImportError:
+        print("   gevent not installed; skipping gevent mode")
+    
+    for mode in modes:
+        server, base_url = start_gunicorn(8751, {'SERVING_MODE': mode})
+        try:
+            drive_load(base_url, SERVING_PATHS, 4, 2)  # warm up
+            timings, errors, elapsed = drive_load(base_url, SERVING_PATHS, clients, duration)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"   {mode:<8} {len(timings) / elapsed:8.1f} req/s   p50 {percentile(timings, 50):8.2f} ms"
+              f"   p99 {percentile(timings, 99):8.2f} ms   errors {sum(errors.values())}"
+              + (f" {errors}" if errors else ''))
+    return 0
+
+
+def attack(base_url, worker, stop, results):
+    outcomes = {}
+    attempt = 0
+    while not stop.is_set():
+        attempt += 1
+        body = urllib.parse.urlencode({'username': random_username(worker, attempt),
+                                       'password': f'guess-{attempt}'}).encode()
+        request = urllib.request.Request(base_url + '/admin/login', data=body, headers={
+            # Spread over many addresses and names, as in credential stuffing
+            'X-Forwarded-For': f"10.{worker}.{attempt // 250 % 250}.{attempt % 250}"
+        })
+        try:
+            status = urllib.request.urlopen(request, timeout=30).status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        outcomes[status] = outcomes.get(status, 0) + 1
+    results.put(outcomes)
+
+
+def random_username(worker, attempt):
+    # Mostly the real admin, plus a spread of guessed names
+    return 'Ntando' if attempt % 3 == 0 else f"admin{worker}-{attempt % 50}"
+
+
+# Load-test and regression suite
+SUITE_ADMIN = ('bench', 'bench-password')
+# Scenario -> relative weight in the request mix
+SUITE_MIX = {'index': 3, 'services': 3, 'gallery': 3, 'track': 3, 'submit_order': 1, 'admin_dashboard': 1}
+# Status a working scenario answers with (200 otherwise); an error page is not a measurement
+SUITE_EXPECTED_STATUS = {'submit_order': 302}
+# Suite runs hammer logins and orders from one address; lift the per-IP protections
+SUITE_ENV = {'LOGIN_RATE_LIMIT_IP': '0', 'LOGIN_RATE_LIMIT_USER': '0', 'LOGIN_HASH_RATE_LIMIT': '0'}
+CSRF_RE = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+
+def seed_volumes(orders, logos, reviews, messages):
+    """Bulk-insert synthetic rows; returns the tracking numbers of the seeded orders"""
+    print(f"🌱 Seeding {orders} orders, {logos} logos, {reviews} reviews, {messages} messages")
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    service_ids = list(SERVICES)
+    statuses = ['pending', 'in-progress', 'completed', 'cancelled']
+    tracking_numbers = [f"NTD-BENCH-{i:08d}" for i in range(orders)]
+    
+    def batches(rows, size=5000):
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+    
+    with app.app_context():
+        if not Admin.query.filter_by(username=SUITE_ADMIN[0]).first():
+            db.session.add(Admin(username=SUITE_ADMIN[0], password=generate_password_hash(SUITE_ADMIN[1])))
+        order_rows = []
+        for i, tracking_number in enumerate(tracking_numbers):
+            service_id = rng.choice(service_ids)
+            status = rng.choice(statuses)
+            placed = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            order_rows.append({
+                'service': SERVICES[service_id]['name'], 'service_id': service_id,
+                'customer_name': f"Customer {i}", 'customer_email': f"customer{i}@example.com",
+                'customer_phone': '+263 77 000 0000', 'details': 'Benchmark order',
+                'amount': SERVICES[service_id]['price'], 'order_date': placed, 'status': status,
+                'tracking_number': tracking_number, 'payment_status': 'pending',
+                'completed_date': placed + timedelta(days=2) if status == 'completed' else None
+            })
+        for batch in batches(order_rows):
+            db.session.execute(Order.__table__.insert(), batch)
+        for batch in batches([{'filename': f"bench_{i}.png", 'client_name': f"Client {i}",
+                               'upload_date': now - timedelta(hours=i), 'file_size': 1024,
+                               'file_hash': f"{i:064x}"} for i in range(logos)]):
+            db.session.execute(Logo.__table__.insert(), batch)
+        for batch in batches([{'customer_name': f"Reviewer {i}", 'service': 'Logo Design',
+                               'rating': rng.randint(3, 5), 'review_text': 'Great work',
+                               'is_approved': i % 4 != 0, 'created_at': now - timedelta(days=i)}
+                              for i in range(reviews)]):
+            db.session.execute(Review.__table__.insert(), batch)
+        for batch in batches([{'name': f"Visitor {i}", 'email': f"visitor{i}@example.com",
+                               'message': 'Benchmark message', 'status': 'new' if i % 5 == 0 else 'read',
+                               'created_at': now - timedelta(hours=i)} for i in range(messages)]):
+            db.session.execute(ContactMessage.__table__.insert(), batch)
+        db.session.commit()
+        rebuild_order_rollups()  # the bulk inserts bypass the write paths that maintain them
+    return tracking_numbers
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class SuiteSession:
+    """One simulated visitor: its own cookies, CSRF token and admin login"""
+    
+    def __init__(self, base_url, tracking_numbers, rng):
+        self.base_url = base_url
+        self.tracking_numbers = tracking_numbers
+        self.rng = rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                  NoRedirect)
+        self.csrf_token = None
+        self.logged_in = False
+    
+    def fetch(self, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            if e.code in (301, 302, 303):
+                return e.code, b''
+            raise
+    
+    def run(self, scenario):
+        getattr(self, f"scenario_{scenario}")()
+    
+    def scenario_index(self):
+        self.fetch('/')
+    
+    def scenario_services(self):
+        self.fetch('/services')
+    
+    def scenario_gallery(self):
+        self.fetch('/gallery')
+    
+    def scenario_track(self):
+        self.fetch(f"/track/{self.rng.choice(self.tracking_numbers)}")
+    
+    def scenario_submit_order(self):
+        if not self.csrf_token:
+            match = CSRF_RE.search(self.fetch('/order/website_design')[1].decode())
+            self.csrf_token = match.group(1) if match else ''
+        status, _ = self.fetch('/submit_order', {
+            'csrf_token': self.csrf_token, 'service_id': 'website_design',
+            'customer_name': 'Load Test', 'customer_email': 'load@example.com',
+            'customer_phone': '+263 77 123 4567', 'details': 'Benchmark'
+        })
+        if status != 302:
+            raise OSError(f"submit_order returned {status}")
+    
+    def scenario_admin_dashboard(self):
+        if not self.logged_in:
+            self.fetch('/admin/login', {'username': SUITE_ADMIN[0], 'password': SUITE_ADMIN[1]})
+            self.logged_in = True
+        status, _ = self.fetch('/admin/dashboard')
+        if status != 200:
+            raise OSError(f"admin_dashboard returned {status}")
+
+
+def suite_client(base_url, tracking_numbers, threads, deadline, seed_value, results):
+    """Run weighted scenarios from several visitor threads until the deadline"""
+    samples = {name: [] for name in SUITE_MIX}
+    errors = {name: 0 for name in SUITE_MIX}
+    mix = [name for name, weight in SUITE_MIX.items() for _ in range(weight)]
+    
+    def visitor(offset):
+        rng = random.Random(seed_value * 1000 + offset)
+        session = SuiteSession(base_url, tracking_numbers, rng)
+        while time.time() < deadline:
+            scenario = rng.choice(mix)
+            started = time.perf_counter()
+            try:
+                session.run(scenario)
+                samples[scenario].append((time.perf_counter() - started) * 1000)
+            except OSError:
+                errors[scenario] += 1
+    
+    workers = [threading.Thread(target=visitor, args=(offset,)) for offset in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((samples, errors))
+
+
+def suite_queries(tracking_numbers, requests_per_route=20):
+    """Mean SQL statements per request for each scenario, measured in-process; None if a scenario is broken"""
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    client = app.test_client()
+    client.post('/admin/login', data={'username': SUITE_ADMIN[0], 'password': SUITE_ADMIN[1]})
+    client.get('/order/website_design')
+    with client.session_transaction() as session:
+        csrf_token = session.get('csrf_token')
+    paths = {
+        'index': lambda i: client.get('/'),
+        'services': lambda i: client.get('/services'),
+        'gallery': lambda i: client.get('/gallery'),
+        'track': lambda i: client.get(f"/track/{tracking_numbers[i % len(tracking_numbers)]}"),
+        'submit_order': lambda i: client.post('/submit_order', data={
+            'csrf_token': csrf_token, 'service_id': 'website_design', 'customer_name': 'Query Count',
+            'customer_email': 'queries@example.com', 'customer_phone': '+263 77 123 4567'}),
+        'admin_dashboard': lambda i: client.get('/admin/dashboard'),
+    }
+    queries = {}
+    broken = {}
+    for name, request in paths.items():
+        statuses = set()
+        for i in range(requests_per_route + 1):
+            if i == 1:
+                counter.count = 0  # the first request warms caches, as on a running server
+            statuses.add(request(i).status_code)
+        queries[name] = counter.count / requests_per_route
+        if statuses != {SUITE_EXPECTED_STATUS.get(name, 200)}:
+            broken[name] = sorted(statuses)
+    if broken:
+        for name, statuses in broken.items():
+            print(f"   ⚠ {name} answered {statuses}, expected {SUITE_EXPECTED_STATUS.get(name, 200)}")
+        return None
+    return queries
+
+
+def run_suite(args):
+    tracking_numbers = seed_volumes(args.orders, args.logos, args.reviews, args.messages)
+    print("🧮 Counting queries per request")
+    queries = suite_queries(tracking_numbers)
+    if queries is None:
+        print("   ⚠ Fix the broken scenarios before measuring them")
+        return 1
+    
+    print(f"🏋️  {args.clients} clients for {args.duration}s against gunicorn ({args.mode})")
+    server, base_url = start_gunicorn(8752, dict(SUITE_ENV, SERVING_MODE=args.mode))
+    try:
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = min(4, args.clients)
+        deadline = time.time() + args.duration
+        spawned = [context.Process(target=suite_client,
+                                   args=(base_url, tracking_numbers, args.clients // processes +
+                                         (i < args.clients % processes), deadline, i, results))
+                   for i in range(processes)]
+        started = time.perf_counter()
+        for process in spawned:
+            process.start()
+        samples = {name: [] for name in SUITE_MIX}
+        errors = {name: 0 for name in SUITE_MIX}
+        for _ in spawned:
+            client_samples, client_errors = results.get()
+            for name in SUITE_MIX:
+                samples[name].extend(client_samples[name])
+                errors[name] += client_errors[name]
+        for process in spawned:
+            process.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'database': dialect,
+            'mode': args.mode, 'clients': args.clients, 'duration': args.duration,
+            'volumes': {'orders': args.orders, 'logos': args.logos, 'reviews': args.reviews,
+                        'messages': args.messages},
+        },
+        'routes': {}
+    }
+    all_timings = []
+    print(f"\n   {'route':<16} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'queries':>8}")
+    for name in SUITE_MIX:
+        timings = samples[name]
+        all_timings.extend(timings)
+        stats = {
+            'requests': len(timings),
+            'throughput': len(timings) / elapsed,
+            'p50': percentile(timings, 50) if timings else None,
+            'p95': percentile(timings, 95) if timings else None,
+            'p99': percentile(timings, 99) if timings else None,
+            'errors': errors[name],
+            'error_rate': errors[name] / max(1, len(timings) + errors[name]),
+            'queries_per_request': queries[name],
+        }
+        report['routes'][name] = stats
+        fmt = lambda value: f"{value:9.2f}" if value is not None else f"{'-':>9}"
+        print(f"   {name:<16} {stats['throughput']:8.1f} {fmt(stats['p50'])} {fmt(stats['p95'])} {fmt(stats['p99'])}"
+              f" {errors[name]:7d} {queries[name]:8.2f}")
+    report['total'] = {'requests': len(all_timings), 'throughput': len(all_timings) / elapsed,
+                       'p99': percentile(all_timings, 99) if all_timings else None}
+    print(f"   {'total':<16} {report['total']['throughput']:8.1f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return check_regressions(report, baseline, args.threshold)
+    return 0
+
+
+def check_regressions(report, baseline, threshold):
+    """Fail when a route got slower, lost throughput, errors more or runs more queries than the baseline"""
+    print(f"\n📏 Comparing with baseline ({threshold:.0%} threshold)")
+    regressions = []
+    for name, stats in report['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            continue
+        if stats['p95'] and before.get('p95') and stats['p95'] > before['p95'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95']:.2f} -> {stats['p95']:.2f} ms")
+        if before.get('throughput') and stats['throughput'] < before['throughput'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput']:.1f} -> {stats['throughput']:.1f} req/s")
+        if stats['error_rate'] > before.get('error_rate', 0) + 0.01:
+            regressions.append(f"{name}: error rate {before.get('error_rate', 0):.1%} -> {stats['error_rate']:.1%}")
+        if stats['queries_per_request'] > before.get('queries_per_request', 0) + 0.5:
+            regressions.append(f"{name}: queries/request {before['queries_per_request']:.2f} -> "
+                               f"{stats['queries_per_request']:.2f}")
+    for regression in regressions:
+        print(f"   ❌ {regression}")
+    if not regressions:
+        print("   ✅ No regressions")
+    return 1 if regressions else 0
+
+
+# Admin search latency: exact identifiers, a rare name, prefixes and a term every row shares
+SEARCH_QUERIES = ['NTD-BENCH-00004242', 'customer4242@example.com', 'Customer 4242', 'customer 42',
+                  'visitor17', 'benchmark', 'reviewer 9']
+SEARCH_TARGET_MS = 100
+
+
+def search_benchmark(args, runs=20):
+    """Time /admin/search per query, in-process so only the query and serialization are measured"""
+    seed_volumes(args.orders, args.logos, args.reviews, args.messages)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+        session['admin_id'] = 1
+    print(f"\n🔎 Admin search over {args.orders} orders ({runs} runs per query)")
+    slow = 0
+    for query in SEARCH_QUERIES:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.get('/admin/search', query_string={'q': query})
+            timings.append((time.perf_counter() - started) * 1000)
+        hits = sum(len(result['items']) for result in response.get_json()['results'].values())
+        p95 = percentile(timings, 95)
+        slow += p95 > SEARCH_TARGET_MS
+        print(f"   {query:<28} {hits:3d} hits  p50 {percentile(timings, 50):7.2f} ms"
+              f"  p95 {p95:7.2f} ms{'  ⚠' if p95 > SEARCH_TARGET_MS else ''}")
+    if slow:
+        print(f"   ⚠ {slow} queries over {SEARCH_TARGET_MS} ms at p95")
+        return 1
+    print(f"   ✅ All queries within {SEARCH_TARGET_MS} ms at p95")
+    return 0
+
+
+class SinkHandler:
+    """aiosmtpd handler that counts deliveries per recipient"""
+    
+    def __init__(self):
+        self.received = {}
+    
+    async def handle_DATA(self, server, session, envelope):
+        for recipient in envelope.rcpt_tos:
+            self.received[recipient] = self.received.get(recipient, 0) + 1
+        return '250 OK'
+
+
+def newsletter_benchmark(subscribers=5000, port=8825):
+    """Send one campaign to an SMTP sink, crashing the first sender after one claimed batch"""
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("⚠ aiosmtpd is not installed (pip install aiosmtpd)")
+        return 1
+    
+    handler = SinkHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    app.config.update(SMTP_HOST='127.0.0.1', SMTP_PORT=port, SMTP_STARTTLS=False, NEWSLETTER_RATE_PER_SECOND=0)
+    try:
+        with app.app_context():
+            for start in range(0, subscribers, 5000):
+                db.session.execute(Newsletter.__table__.insert(), [
+                    {'email': f"subscriber{i}@example.com", 'is_active': True, 'subscribed_date': datetime.utcnow(),
+                     'unsubscribe_token': hashlib.sha256(str(i).encode()).hexdigest()}
+                    for i in range(start, min(start + 5000, subscribers))])
+            campaign = NewsletterCampaign(subject='Benchmark', body_text='Hello from the benchmark',
+                                          body_html='<p>Hello from the benchmark</p>')
+            db.session.add(campaign)
+            db.session.commit()
+            
+            # A sender that claims a batch and dies before recording it; its claim has expired
+            start_campaign(campaign)
+            db.session.commit()
+            timeout = app.config['NEWSLETTER_CLAIM_TIMEOUT']
+            app.config['NEWSLETTER_CLAIM_TIMEOUT'] = 0
+            claimed = CampaignSender(campaign.id)._claim(datetime.utcnow())
+            app.config['NEWSLETTER_CLAIM_TIMEOUT'] = timeout
+            
+            print(f"\n📧 Sending to {subscribers} subscribers ({app.config['NEWSLETTER_CONNECTIONS']} connections, "
+                  f"{len(claimed)} abandoned by a crashed sender)")
+            started = time.perf_counter()
+            progress = CampaignSender(campaign.id).run()
+            elapsed = time.perf_counter() - started
+    finally:
+        controller.stop()
+    
+    duplicates = sum(1 for count in handler.received.values() if count > 1)
+    print(f"   {progress['sent']} sent in {elapsed:.2f}s ({progress['sent'] / elapsed:.0f} messages/s), "
+          f"{progress['unknown']} unknown, {duplicates} duplicates")
+    if duplicates or progress['sent'] + progress['unknown'] != subscribers or progress['status'] != 'sent':
+        print("   ⚠ Campaign did not complete exactly once")
+        return 1
+    print("   ✅ Every subscriber sent at most once")
+    return 0
+
+
+class StubProvider(http.server.BaseHTTPRequestHandler):
+    """WhatsApp API stand-in that fails the first request and records the rest"""
+    batches = []
+    failures_left = 1
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if StubProvider.failures_left:
+            StubProvider.failures_left -= 1
+            self.send_response(500)
+        else:
+            StubProvider.batches.append((self.headers.get('Authorization'), body['to'], len(body['messages'])))
+            self.send_response(200)
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def notification_check(timeout=15):
+    """Queue notifications, start the dispatcher the way a worker does at boot, and wait for delivery"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app.config.update(WHATSAPP_API_URL=f"http://127.0.0.1:{server.server_port}/messages",
+                      WHATSAPP_API_TOKEN='stub-token', NOTIFY_BACKOFF_BASE=0, NOTIFICATION_DISPATCHER='thread')
+    expected = {'+10000000001': 3, '+10000000002': 1}
+    with app.app_context():
+        for destination, count in expected.items():
+            for i in range(count):
+                queue_notification({'service': 'domain', 'tracking_number': f"NTD-BENCH-{i}"}, destination)
+        db.session.commit()
+    
+    print(f"\n🔔 Dispatching {sum(expected.values())} notifications to a stub provider (first request fails)")
+    notification_dispatcher.ensure_started()
+    deadline = time.monotonic() + timeout
+    with app.app_context():
+        while time.monotonic() < deadline:
+            statuses = dict(db.session.query(NotificationOutbox.status, db.func.count(NotificationOutbox.id))
+                            .group_by(NotificationOutbox.status).all())
+            db.session.rollback()
+            if statuses.get('sent', 0) + statuses.get('failed', 0) == sum(expected.values()):
+                break
+            time.sleep(0.1)
+    server.shutdown()
+    
+    delivered = {}
+    for authorization, destination, count in StubProvider.batches:
+        delivered[destination] = delivered.get(destination, 0) + count
+    print(f"   outbox {statuses}, {len(StubProvider.batches)} batches delivered")
+    if delivered != expected or statuses != {'sent': sum(expected.values())} \
+            or any(authorization != 'Bearer stub-token' for authorization, _, _ in StubProvider.batches):
+        print(f"   ⚠ Expected {expected} delivered once each, got {delivered}")
+        return 1
+    print("   ✅ Failed batch retried, every message delivered once")
+    return 0
+
+
+def storage_check(port=8826, size_mb=12):
+    """Multipart upload, presigned and CDN fetches, download and delete against a local moto S3 server"""
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        print("⚠ moto is not installed (pip install moto[server])")
+        return 1
+    
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.setdefault(name, 'testing')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # moto's request log
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    endpoint = f"http://127.0.0.1:{port}"
+    bucket = 'ntandostore-bench'
+    threshold = 5 * 1024 * 1024  # S3's minimum part size
+    failures = []
+    try:
+        # Built from the same settings a deployment uses
+        app.config.update(STORAGE_BACKEND='s3', S3_BUCKET=bucket, S3_ENDPOINT_URL=endpoint,
+                          S3_MULTIPART_THRESHOLD=threshold, S3_PUBLIC_URL=None)
+        storage = create_storage()
+        # The bucket sits behind a CDN in production; moto serves unsigned GETs the same way
+        app.config['S3_PUBLIC_URL'] = f"{endpoint}/{bucket}"
+        cdn = create_storage()
+        storage.client.create_bucket(Bucket=bucket)
+        
+        print(f"\n🪣 S3 storage against moto ({size_mb}MB upload, {threshold // (1024 * 1024)}MB multipart threshold)")
+        payload = os.urandom(size_mb * 1024 * 1024)
+        upload = HashingUploadFile(os.environ['UPLOAD_TMP_FOLDER'])
+        upload.write(payload)
+        key = f"logos/bench_{upload.hexdigest()[:12]}.png"
+        started = time.perf_counter()
+        storage.save_upload(upload, key)
+        elapsed = time.perf_counter() - started
+        head = storage.client.head_object(Bucket=bucket, Key=key)
+        parts = int(head['ETag'].strip('"').partition('-')[2] or 1)
+        print(f"   uploaded in {elapsed:.2f}s as {parts} parts, {head['ContentType']}, {head['CacheControl']}")
+        if parts < 2:
+            failures.append('upload above the threshold was not multipart')
+        
+        for label, url in (('presigned', storage.url(key)), ('CDN', cdn.url(key))):
+            with urllib.request.urlopen(url, timeout=30) as response:
+                served = response.read()
+            print(f"   {label} URL {url.split('?')[0]}{' (signed)' if '?' in url else ''}: "
+                  f"{'matches' if served == payload else 'DIFFERS'}")
+            if served != payload:
+                failures.append(f"{label} URL served different bytes")
+        
+        with storage.local_copy(key) as path, open(path, 'rb') as f:
+            if f.read() != payload:
+                failures.append('local_copy read back different bytes')
+        
+        storage.delete(key)
+        listed = storage.client.list_objects_v2(Bucket=bucket).get('KeyCount', 0)
+        print(f"   deleted; {listed} objects left")
+        if listed:
+            failures.append('delete left objects behind')
+    finally:
+        server.stop()
+    
+    for failure in failures:
+        print(f"   ⚠ {failure}")
+    if not failures:
+        print("   ✅ Multipart upload, presigned and CDN URLs, download and delete all work")
+    return 1 if failures else 0
+
+
+def seed():
+    """Create tables and an active company logo"""
+    with app.app_context():
+        db.create_all()
+        run_migrations()
+        db.session.add(CompanyLogo(filename='company_bench.png', is_active=True, file_size=1024))
+        db.session.commit()
+
+
+def run(label, counter):
+    """Hit every route and report queries and latency per request"""
+    print(f"\n📊 {label}")
+    client = app.test_client()
+    for route in ROUTES:
+        counter.count = 0
+        started = time.perf_counter()
+        for _ in range(REQUESTS_PER_ROUTE):
+            client.get(route)
+        elapsed = time.perf_counter() - started
+        print(f"   {route:<32} {counter.count / REQUESTS_PER_ROUTE:5.2f} queries/request"
+              f"  {elapsed / REQUESTS_PER_ROUTE * 1000:7.2f} ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--explain', action='store_true', help='check hot queries use indexes')
+    parser.add_argument('--cold-start', action='store_true', help='time worker boot and first request')
+    parser.add_argument('--catalog', action='store_true', help='time service catalog lookups')
+    parser.add_argument('--uploads', action='store_true', help='time large file uploads')
+    parser.add_argument('--login-flood', action='store_true', help='time public pages during a login flood')
+    parser.add_argument('--serving', action='store_true', help='compare gunicorn serving modes under load')
+    parser.add_argument('--search', action='store_true', help='time admin search at --orders rows')
+    parser.add_argument('--newsletter', action='store_true', help='send a campaign to a local SMTP sink')
+    parser.add_argument('--notifications', action='store_true', help='deliver queued notifications to a stub provider')
+    parser.add_argument('--storage', action='store_true', help='round-trip uploads through S3 storage on moto')
+    suite = parser.add_argument_group('load-test suite')
+    suite.add_argument('--suite', action='store_true', help='run the HTTP load-test and regression suite')
+    suite.add_argument('--orders', type=int, default=5000)
+    suite.add_argument('--logos', type=int, default=200)
+    suite.add_argument('--reviews', type=int, default=100)
+    suite.add_argument('--messages', type=int, default=1000)
+    suite.add_argument('--clients', type=int, default=16, help='concurrent simulated visitors')
+    suite.add_argument('--duration', type=int, default=20, help='seconds of load')
+    suite.add_argument('--mode', default='gthread', choices=['sync', 'gthread', 'gevent'], help='gunicorn serving mode')
+    suite.add_argument('--output', help='write results as JSON to this path')
+    suite.add_argument('--baseline', help='earlier --output file; exit 1 on regressions')
+    suite.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression (default 0.25)')
+    args = parser.parse_args()
+    
+    print("🚀 NtandoStore query benchmark")
+    print("=" * 50)
+    seed()
+    if args.explain:
+        return check_indexes()
+    if args.cold_start:
+        return cold_start()
+    if args.catalog:
+        return catalog_benchmark()
+    if args.uploads:
+        return upload_benchmark()
+    if args.login_flood:
+        return login_flood()
+    if args.serving:
+        return serving_modes()
+    if args.suite:
+        return run_suite(args)
+    if args.search:
+        return search_benchmark(args)
+    if args.newsletter:
+        return newsletter_benchmark()
+    if args.notifications:
+        return notification_check()
+    if args.storage:
+        return storage_check()
+    
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    ttl = app.config['COMPANY_LOGO_CACHE_TTL']
+    app.config['COMPANY_LOGO_CACHE_TTL'] = 0
+    run("Company logo cache disabled", counter)
+    app.config['COMPANY_LOGO_CACHE_TTL'] = ttl
+    run(f"Company logo cache enabled (TTL {ttl}s)", counter)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
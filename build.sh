@@ -6,4 +6,7 @@ echo "Installing dependencies..."
 pip install --upgrade pip
 pip install -r requirements.txt
 
+echo "Fingerprinting and precompressing static assets..."
+flask --app app build-assets
+
 echo "Build completed successfully!"
@@ -0,0 +1,112 @@
+# Gunicorn configuration for Ntandostore
+#
+# SERVING_MODE picks the worker model:
+#   sync    - one request at a time per process; 2 x CPU + 1 workers (default)
+#   gthread - CPU + 1 workers, each with a thread pool no larger than its DB pool; needed for
+#             live updates (SSE), which sync workers refuse
+#   gevent  - CPU + 1 workers, each serving as many greenlets as its DB pool can hold
+#
+# Sizing follows the per-process SQLAlchemy pool (DB_POOL_SIZE + DB_MAX_OVERFLOW, the same
+# variables app.py uses for SQLALCHEMY_ENGINE_OPTIONS), and DB_MAX_CONNECTIONS caps the worker
+# count so every worker's pool fits on the database server. WEB_CONCURRENCY, GUNICORN_THREADS
+# and GUNICORN_TIMEOUT override the derived values.
+#
+# Load test comparing the modes (requests/sec and p99):
+#   python benchmark.py --serving
+#
+# Workers write Prometheus samples to PROMETHEUS_MULTIPROC_DIR so /metrics reports totals for
+# the whole server; the directory is emptied on every start.
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Exported so the workers' app sees the mode actually in use (it sizes SSE slots from it)
+mode = os.environ.setdefault('SERVING_MODE', 'sync')
+cpus = multiprocessing.cpu_count()
+pool_size = int(os.environ.get('DB_POOL_SIZE', 10))
+pool_capacity = pool_size + int(os.environ.get('DB_MAX_OVERFLOW', 20))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'ntandostore-metrics'))
+
+if mode == 'sync':
+    worker_class = 'sync'
+    workers = 2 * cpus + 1
+    connections_per_worker = 1
+    # Sync workers hold the process for the whole request, slow uploads included
+    timeout = 120
+elif mode == 'gthread':
+    worker_class = 'gthread'
+    workers = cpus + 1
+    # Threads beyond the steady pool would only queue on pool overflow connections
+    threads = int(os.environ.get('GUNICORN_THREADS', min(pool_size, 8)))
+    connections_per_worker = threads
+    timeout = 60
+elif mode == 'gevent':
+    worker_class = 'gevent'
+    workers = cpus + 1
+    # In-flight requests each hold a pooled connection until teardown
+    worker_connections = pool_capacity
+    connections_per_worker = pool_capacity
+    timeout = 60
+else:
+    raise RuntimeError(f"Unknown SERVING_MODE '{mode}'")
+
+workers = int(os.environ.get('WEB_CONCURRENCY', workers))
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 0))  # 0 = no server-side limit known
+if db_max_connections:
+    # Extra connections per worker: the notification dispatcher and image jobs, plus the
+    # LISTEN connection relaying live-update events on Postgres
+    workers = max(1, min(workers, db_max_connections // (connections_per_worker + 2)))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', timeout))
+graceful_timeout = 30
+keepalive = 5  # above the 2s default so the proxy can reuse upstream connections; ignored by sync
+max_requests = 1000
+max_requests_jitter = 100
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Bootstrap once per deploy, before any worker is forked"""
+    server.log.info(f"Serving mode {mode}: {workers} workers"
+                    + (f" x {threads} threads" if mode == 'gthread' else '')
+                    + (f" x {worker_connections} connections" if mode == 'gevent' else ''))
+    # Samples left by a previous server would be added to this one's totals
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    if os.environ.get('BOOTSTRAP_ON_START', 'true').lower() != 'true':
+        return
+    # Run in a child process so the master never imports the app or opens DB connections
+    server.log.info("Running one-shot bootstrap")
+    env = {key: value for key, value in os.environ.items() if key != 'PROMETHEUS_MULTIPROC_DIR'}
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap'], check=True, env=env)
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative under gevent, before the worker opens any connection"""
+    if mode != 'gevent':
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen is not installed; database calls will block the gevent worker")
+        return
+    patch_psycopg()
+
+
+def post_worker_init(worker):
+    """Start this worker's notification dispatcher now rather than at the first queued message"""
+    from app import notification_dispatcher
+    notification_dispatcher.ensure_started()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (pool usage) from the /metrics totals"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,4 +1,4 @@
-from app import app, db, Admin
+from app import app, db, Admin, run_migrations
 from werkzeug.security import generate_password_hash
 
 def init_database():
@@ -6,6 +6,7 @@ def init_database():
         try:
             print("Creating database tables...")
             db.create_all()
+            run_migrations()
             
             # Create default admin if not exists
             admin = Admin.query.filter_by(username='Ntando').first()
@@ -19,19 +19,13 @@ else
     source venv/bin/activate
 fi
 
-# Check if database needs initialization
-echo "🔍 Checking database status..."
-python3 -c "
-import sys
-try:
-    from app import app, db
-    with app.app_context():
-        db.create_all()
-        print('✅ Database tables ready')
-except Exception as e:
-    print(f'❌ Database error: {e}')
-    sys.exit(1)
-"
+# One-shot bootstrap: directories, schema, migrations and default admin
+echo "🔍 Bootstrapping database..."
+if ! flask --app app bootstrap; then
+    echo "❌ Database bootstrap failed"
+    exit 1
+fi
+echo "✅ Database tables ready"
 
 # Create necessary directories
 echo "📁 Creating directories..."
@@ -49,4 +43,6 @@ echo "✅ Startup complete!"
 
 # Start the application
 echo "🌟 Starting Gunicorn server..."
-exec gunicorn app:app --bind 0.0.0.0:$PORT --workers 3 --timeout 120 --max-requests 1000 --max-requests-jitter 100 --access-logfile - --error-logfile -
+# Bootstrap already ran above, so skip the gunicorn on_starting hook
+export BOOTSTRAP_ON_START=false
+exec gunicorn app:app -c gunicorn.conf.py
@@ -259,13 +259,114 @@ function setupTrackingWidget() {
                 const trackingNumber = trackingInput.value.trim();
                 
                 if (trackingNumber) {
-                    window.location.href = `/track/${trackingNumber}`;
+                    showTrackingResult(trackingNumber);
                 }
             });
         }
     }
 }
 
+let trackingEvents = null;
+let trackingPoll = null;
+const TRACKING_POLL_INTERVAL = 30000;
+
+async function showTrackingResult(trackingNumber) {
+    const trackingForm = $('#trackingForm');
+    let result = $('#trackingResult');
+    if (!result) {
+        result = document.createElement('div');
+        result.id = 'trackingResult';
+        result.className = 'tracking-result';
+        trackingForm.after(result);
+    }
+    
+    if (trackingEvents) {
+        trackingEvents.close();
+        trackingEvents = null;
+    }
+    clearTimeout(trackingPoll);
+    trackingPoll = null;
+    
+    try {
+        const response = await fetch(`/api/track/${encodeURIComponent(trackingNumber)}`);
+        const data = await response.json();
+        if (!response.ok) {
+            result.textContent = data.error;
+            return;
+        }
+        renderTrackingResult(result, data);
+        
+        // Status changes are pushed from the server; poll only when the stream is unavailable
+        trackingEvents = subscribeToLiveUpdates(`/events?track=${encodeURIComponent(data.tracking_number)}`, {
+            order_status: (update) => {
+                data.status = update.status;
+                if (update.status === 'completed' && !data.completed_date) {
+                    data.completed_date = new Date().toISOString();
+                }
+                renderTrackingResult(result, data);
+            }
+        }, () => {
+            trackingEvents = null;
+            pollTrackingResult(result, data, response.headers.get('ETag'));
+        });
+    } catch (error) {
+        result.textContent = 'Could not reach the tracking service. Please try again.';
+    }
+}
+
+function renderTrackingResult(result, data) {
+    const lines = [
+        data.service,
+        `Status: ${data.status}`,
+        `Ordered: ${new Date(data.order_date).toLocaleDateString()}`
+    ];
+    if (data.completed_date) {
+        lines.push(`Completed: ${new Date(data.completed_date).toLocaleDateString()}`);
+    }
+    result.textContent = lines.join('\n');
+}
+
+// Re-fetch the tracking API with the last ETag, so unchanged orders cost a 304
+function pollTrackingResult(result, data, etag) {
+    const poll = async () => {
+        try {
+            const response = await fetch(`/api/track/${encodeURIComponent(data.tracking_number)}`, {
+                headers: etag ? { 'If-None-Match': etag } : {}
+            });
+            if (response.ok) {
+                etag = response.headers.get('ETag');
+                Object.assign(data, await response.json());
+                renderTrackingResult(result, data);
+            }
+        } catch (error) {
+            // Offline for now; try again on the next tick
+        }
+        trackingPoll = setTimeout(poll, TRACKING_POLL_INTERVAL);
+    };
+    trackingPoll = setTimeout(poll, TRACKING_POLL_INTERVAL);
+}
+
+// Live Updates (server-sent events); the browser reconnects on its own when a stream ends.
+// onUnavailable runs when streaming is unsupported or the server refuses the stream.
+function subscribeToLiveUpdates(url, handlers, onUnavailable) {
+    if (!window.EventSource) {
+        if (onUnavailable) onUnavailable();
+        return null;
+    }
+    const source = new EventSource(url);
+    Object.entries(handlers).forEach(([eventName, handler]) => {
+        source.addEventListener(eventName, (event) => handler(JSON.parse(event.data)));
+    });
+    source.onerror = () => {
+        // Refused streams (no slots on this worker, e.g. sync workers) are not retried by the browser
+        if (source.readyState === EventSource.CLOSED) {
+            source.close();
+            if (onUnavailable) onUnavailable();
+        }
+    };
+    return source;
+}
+
 // Navigation Active State
 function setupNavigationActive() {
     const currentPath = window.location.pathname;
@@ -484,6 +585,109 @@ function validatePhone(phone) {
     return pattern.test(phone) && phone.length >= 10;
 }
 
+// Gallery infinite scroll - pages through /api/gallery with keyset cursors
+document.addEventListener('DOMContentLoaded', setupGalleryFeed);
+
+function setupGalleryFeed() {
+    const loadMoreBtn = $('#loadMoreBtn');
+    const grid = $('#galleryGrid');
+    const template = $('#galleryItemTemplate');
+    if (!loadMoreBtn || !grid || !template || !loadMoreBtn.dataset.feedUrl) return;
+    
+    let loading = false;
+    
+    function renderItem(logo) {
+        const item = template.content.firstElementChild.cloneNode(true);
+        const img = item.querySelector('img');
+        const name = logo.client_name || 'Client Project';
+        
+        const source = item.querySelector('source');
+        img.src = logo.url;
+        if (logo.srcset && logo.srcset.webp) {
+            source.srcset = logo.srcset.webp;
+            img.srcset = logo.srcset.fallback;
+        } else {
+            source.remove();
+        }
+        img.alt = logo.client_name || 'Portfolio Item';
+        item.dataset.category = logo.category || 'branding';
+        item.querySelectorAll('.gallery-title').forEach(title => title.textContent = name);
+        
+        const uploaded = logo.upload_date ? new Date(logo.upload_date) : null;
+        item.querySelector('.project-date-text').textContent = uploaded
+            ? uploaded.toLocaleDateString('en-US', { month: 'short', day: '2-digit', year: 'numeric' })
+            : '';
+        
+        const size = item.querySelector('.project-size');
+        if (logo.file_size) {
+            item.querySelector('.project-size-text').textContent = (logo.file_size / 1024).toFixed(1) + 'KB';
+        } else {
+            size.remove();
+        }
+        
+        const actions = { view: 'viewProject', share: 'shareProject', like: 'likeProject' };
+        item.querySelectorAll('[data-action]').forEach(button => {
+            button.addEventListener('click', () => {
+                const handler = window[actions[button.dataset.action]];
+                if (typeof handler === 'function') handler(logo.id);
+            });
+        });
+        
+        const activeFilter = $('.filter-btn.active');
+        const filter = activeFilter ? activeFilter.dataset.filter : 'all';
+        if (filter !== 'all' && item.dataset.category !== filter) {
+            item.style.display = 'none';
+        }
+        return item;
+    }
+    
+    function loadNextPage() {
+        const cursor = loadMoreBtn.dataset.nextCursor;
+        if (loading || !cursor) return;
+        loading = true;
+        loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+        
+        fetch(`${loadMoreBtn.dataset.feedUrl}?after=${encodeURIComponent(cursor)}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`Gallery feed returned ${response.status}`);
+                return response.json();
+            })
+            .then(page => {
+                const fragment = document.createDocumentFragment();
+                page.items.forEach(logo => fragment.appendChild(renderItem(logo)));
+                grid.appendChild(fragment);
+                
+                if (page.next) {
+                    loadMoreBtn.dataset.nextCursor = page.next;
+                    loadMoreBtn.innerHTML = '<i class="fas fa-plus"></i> Load More Projects';
+                } else {
+                    delete loadMoreBtn.dataset.nextCursor;
+                    loadMoreBtn.innerHTML = '<i class="fas fa-check"></i> All Projects Loaded';
+                    loadMoreBtn.disabled = true;
+                    if (observer) observer.disconnect();
+                }
+            })
+            .catch(error => {
+                console.error('🚨 Gallery feed error:', error);
+                loadMoreBtn.innerHTML = '<i class="fas fa-redo"></i> Retry';
+            })
+            .finally(() => {
+                loading = false;
+            });
+    }
+    
+    loadMoreBtn.addEventListener('click', loadNextPage);
+    
+    // Load the next page automatically as the button scrolls into view
+    let observer = null;
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+        }, { rootMargin: '400px' });
+        observer.observe(loadMoreBtn);
+    }
+}
+
 // Performance Optimizations
 function initializePerformanceOptimizations() {
     // Lazy load images
@@ -642,7 +846,8 @@ window.NtandoStore = {
     validateEmail,
     validatePhone,
     debounce,
-    throttle
+    throttle,
+    subscribeToLiveUpdates
 };
 
 console.log('🎯 Ntandostore JavaScript loaded successfully');